@@ -45,12 +45,78 @@ ROOT_URLCONF = "backend.urls"
 # DRF
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "lms.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # Per-route token buckets, see lms/throttling.py ("<requests>/<period>")
+    "DEFAULT_THROTTLE_RATES": {
+        "auth_google": os.getenv("THROTTLE_AUTH_GOOGLE", "10/min"),
+        "submit_assignment": os.getenv("THROTTLE_SUBMIT_ASSIGNMENT", "20/min"),
+    },
+}
+
+# CACHE
+# "throttle" holds rate-limit counters. locmem is per-process; set
+# THROTTLE_CACHE_BACKEND/LOCATION (e.g. django.core.cache.backends.redis.RedisCache)
+# so all workers share one store.
+# "lecturer" holds lecturer_submissions responses (lms/response_cache.py). The
+# default locmem drops least-recently-used entries past LECTURER_CACHE_MAX_ENTRIES
+# and is only used with one worker; set LECTURER_CACHE_BACKEND/LOCATION to share
+# it between workers.
+LECTURER_CACHE_BACKEND = os.getenv("LECTURER_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "lms-default",
+    },
+    "throttle": {
+        "BACKEND": os.getenv("THROTTLE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("THROTTLE_CACHE_LOCATION", "lms-throttle"),
+    },
+    "lecturer": {
+        "BACKEND": LECTURER_CACHE_BACKEND,
+        "LOCATION": os.getenv("LECTURER_CACHE_LOCATION", "lms-lecturer"),
+        # upper bound on staleness from edits that don't bump the generation
+        "TIMEOUT": int(os.getenv("LECTURER_CACHE_SECONDS", "300")),
+    },
 }
+if LECTURER_CACHE_BACKEND.endswith("LocMemCache"):
+    CACHES["lecturer"]["OPTIONS"] = {"MAX_ENTRIES": int(os.getenv("LECTURER_CACHE_MAX_ENTRIES", "2000"))}
+
+# Generation bumps and hit/miss counters only reach every worker through a
+# shared store, so a per-process locmem cache is only used with a single
+# worker (WEB_CONCURRENCY, as read by gunicorn.conf.py). LECTURER_CACHE_ENABLED=0/1 overrides.
+LECTURER_CACHE_ENABLED = os.getenv(
+    "LECTURER_CACHE_ENABLED",
+    "0" if LECTURER_CACHE_BACKEND.endswith("LocMemCache") and int(os.getenv("WEB_CONCURRENCY", "2")) > 1 else "1",
+) == "1"
+
+# How long a worker trusts its cached copy of a user's token version.
+# Revocation takes effect everywhere within this window (immediately on a shared cache).
+JWT_TOKEN_VERSION_CACHE_SECONDS = int(os.getenv("JWT_TOKEN_VERSION_CACHE_SECONDS", "60"))
+
+# Live grade events (me/events/): "local" for a single ASGI worker,
+# "postgres" to fan out across workers with LISTEN/NOTIFY.
+LMS_EVENTS_BACKEND = os.getenv("LMS_EVENTS_BACKEND", "local")
+# Lifetime of the me/events/ticket/ tickets EventSource puts in the URL.
+STREAM_TICKET_SECONDS = int(os.getenv("STREAM_TICKET_SECONDS", "30"))
+
+# EMAIL (console locally; set EMAIL_BACKEND + EMAIL_HOST etc. in production)
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False") == "True"
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@localhost")
+# digests per SMTP connection in send_notifications
+NOTIFICATION_EMAIL_BATCH_SIZE = int(os.getenv("NOTIFICATION_EMAIL_BATCH_SIZE", "100"))
+
+# ARCHIVING (manage.py archive_cohorts): cohorts whose end_date is older than this
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
 
 # CORS / CSRF
 CSRF_TRUSTED_ORIGINS = [
@@ -0,0 +1,38 @@
+"""
+API-only deployment profile.
+
+    DJANGO_SETTINGS_MODULE=backend.settings_api
+
+Everything is served as JSON with JWT auth, so the admin, sessions,
+messages and static files apps and their middleware are left out. That
+trims import time and per-worker memory. Run the admin from a separate
+process on backend.settings if it is needed.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+API_ONLY_DROP_APPS = {
+    "django.contrib.admin",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+}
+
+API_ONLY_DROP_MIDDLEWARE = {
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",  # JWT in headers, no cookies to protect
+    "django.contrib.auth.middleware.AuthenticationMiddleware",  # DRF authenticates per view
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+}
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_ONLY_DROP_APPS]
+MIDDLEWARE = [mw for mw in MIDDLEWARE if mw not in API_ONLY_DROP_MIDDLEWARE]
+
+# no admin or browsable API to render
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+}
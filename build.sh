@@ -4,8 +4,10 @@ set -o errexit
 # Install dependencies
 pip install -r requirements.txt
 
-# Collect static files
-python manage.py collectstatic --noinput
+# Collect static files (the API-only profile has no staticfiles app)
+if [ "${DJANGO_SETTINGS_MODULE:-backend.settings}" != "backend.settings_api" ]; then
+    python manage.py collectstatic --noinput
+fi
 
 # Run migrations
 python manage.py migrate
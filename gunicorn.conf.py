@@ -0,0 +1,48 @@
+"""
+Gunicorn settings, picked up automatically from the working directory:
+
+    gunicorn backend.wsgi:application
+
+With preload (default) Django, the URLconf and every view module are
+imported once in the master and shared copy-on-write by the workers.
+Set GUNICORN_PRELOAD=0 to load the app in each worker instead.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# recycle workers now and then so slow leaks don't accumulate
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    # Django loads the URLconf (and with it every view module) lazily on
+    # the first request; do it here so the workers inherit it.
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+    # Move everything loaded so far out of the GC's reach: collections in
+    # the workers would otherwise write to these pages and un-share them.
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # without preload the worker hasn't set up Django yet, so there is
+    # nothing inherited to close
+    if not preload_app:
+        return
+
+    # never share a DB socket opened in the master
+    from django.db import connections
+
+    connections.close_all()
@@ -1,15 +1,174 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-# Register your models here.
-
-from django.contrib import admin
 from .models import *
 
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Use the planner's row estimate for unfiltered changelists on PostgreSQL
+    instead of COUNT(*) over the whole table.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if connection.vendor == "postgresql" and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [qs.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > 10000:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
 admin.site.register(Cohort)
-admin.site.register(ApprovedStudentEmail)
 admin.site.register(Course)
-admin.site.register(Enrollment)
 admin.site.register(Module)
 admin.site.register(Assignment)
-admin.site.register(Submission)
-admin.site.register(Grade)
+admin.site.register(UserTokenVersion)
+admin.site.register(CohortCourseRollup)
+admin.site.register(NotificationLog)
+
+
+@admin.register(ApprovedStudentEmail)
+class ApprovedStudentEmailAdmin(LargeTableAdmin):
+    list_display = ("email", "cohort", "status", "approved_at", "approved_by")
+    list_filter = ("status", "cohort")
+    list_select_related = ("cohort", "approved_by")
+    search_fields = ("email",)
+    raw_id_fields = ("approved_by",)
+    actions = ["approve_selected", "revoke_selected"]
+
+    @admin.action(description="Approve selected emails")
+    def approve_selected(self, request, queryset):
+        n = (
+            queryset.exclude(status=ApprovedStudentEmail.Status.APPROVED)
+            .update(status=ApprovedStudentEmail.Status.APPROVED, approved_at=timezone.now(), approved_by=request.user)
+        )
+        self.message_user(request, f"Approved {n} email(s).", messages.SUCCESS)
+
+    @admin.action(description="Revoke selected emails")
+    def revoke_selected(self, request, queryset):
+        n = queryset.exclude(status=ApprovedStudentEmail.Status.REVOKED).update(status=ApprovedStudentEmail.Status.REVOKED)
+        self.message_user(request, f"Revoked {n} email(s).", messages.SUCCESS)
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(LargeTableAdmin):
+    list_display = ("id", "student", "course", "cohort", "status", "enrolled_at")
+    list_filter = ("status", "cohort", "course")
+    list_select_related = ("student", "course", "cohort")
+    raw_id_fields = ("student",)
+
+
+@admin.register(Submission)
+class SubmissionAdmin(LargeTableAdmin):
+    list_display = ("id", "student", "assignment_title", "status", "submitted_at")
+    list_filter = ("status", "assignment__module__course")
+    list_select_related = ("student", "assignment")
+    raw_id_fields = ("student", "assignment")
+
+    @admin.display(description="Assignment", ordering="assignment__title")
+    def assignment_title(self, obj):
+        return obj.assignment.title
+
+
+@admin.register(Grade)
+class GradeAdmin(LargeTableAdmin):
+    list_display = ("id", "submission_id", "student", "score", "locked", "locked_by", "updated_at")
+    list_filter = ("locked",)
+    list_select_related = ("submission__student", "locked_by")
+    raw_id_fields = ("submission",)
+    # locking goes through the action (GradeQuerySet.lock); nothing unlocks
+    readonly_fields = ("locked", "locked_at", "locked_by")
+    actions = ["lock_selected"]
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return self.readonly_fields
+        return ("submission", *self.readonly_fields)
+
+    # locked grades are view-only
+    def has_change_permission(self, request, obj=None):
+        if obj is not None and obj.locked:
+            return False
+        return super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and obj.locked:
+            return False
+        return super().has_delete_permission(request, obj)
+
+    def save_model(self, request, obj, form, change):
+        # same rules and history as grade_submission
+        after = {"score": obj.score, "feedback": obj.feedback}
+        with transaction.atomic():
+            if not change:
+                obj.save()
+                GradeEvent.record(obj.submission_id, request.user, GradeEvent.Action.CREATE, grade_diff({}, after))
+                return
+
+            current = Grade.objects.select_for_update().get(pk=obj.pk)
+            if current.locked:
+                raise PermissionDenied("Grade is locked (FINAL). Cannot edit.")
+            diff = grade_diff({"score": current.score, "feedback": current.feedback}, after)
+            obj.save()
+            if diff:
+                GradeEvent.record(obj.submission_id, request.user, GradeEvent.Action.UPDATE, diff)
+
+    @admin.display(description="Student", ordering="submission__student__username")
+    def student(self, obj):
+        return obj.submission.student
+
+    @admin.action(description="Lock selected grades (FINAL)")
+    def lock_selected(self, request, queryset):
+        n = queryset.lock(by_user=request.user)
+        self.message_user(request, f"Locked {n} grade(s).", messages.SUCCESS)
+
+
+@admin.register(GradeEvent)
+class GradeEventAdmin(LargeTableAdmin):
+    list_display = ("id", "submission_id", "action", "actor", "created_at")
+    list_filter = ("action",)
+    list_select_related = ("actor",)
+    raw_id_fields = ("submission", "actor")
+
+    # append-only: rows come from GradeEvent.record()
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedTranscript)
+class ArchivedTranscriptAdmin(LargeTableAdmin):
+    list_display = ("id", "student_email", "course_title", "cohort", "result", "archived_at")
+    list_filter = ("cohort",)
+    list_select_related = ("cohort",)
+    search_fields = ("student_email",)
+    raw_id_fields = ("student",)
+
+    # written only by archive_cohorts
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -1,11 +1,18 @@
+from collections import defaultdict
+
+from django.conf import settings
 from django.utils import timezone
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Enrollment, Assignment, Submission
+from .archive import transcript_record
+from .stream import issue_stream_ticket
+from .models import ArchivedTranscript, Enrollment, Assignment, Submission
+from .throttling import SubmitAssignmentThrottle
+from .views import course_grade_summary
 
 
 @api_view(["GET"])
@@ -30,6 +37,122 @@ def my_courses(request):
     return Response({"courses": courses})
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def my_events_ticket(request):
+    """Short-lived ticket for opening me/events/ with EventSource (?ticket=...)."""
+    return Response({
+        "ticket": issue_stream_ticket(request.user),
+        "expires_in": getattr(settings, "STREAM_TICKET_SECONDS", 30),
+    })
+
+
+DASHBOARD_SECTIONS = ("assignments", "grades", "summary")
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def my_dashboard(request):
+    """
+    Everything the student home screen needs for all ACTIVE enrollments in
+    one response (replaces me/courses/ + me/assignments/ + me/grades/ per course).
+    At most three queries regardless of the number of courses.
+
+    Optional fields=assignments,grades,summary limits the per-course sections
+    (course id/title/cohort are always included). Skipping `assignments`
+    also skips its query.
+    """
+    requested = request.query_params.get("fields")
+    if requested:
+        sections = {f.strip() for f in requested.split(",")}
+        unknown = sections - set(DASHBOARD_SECTIONS)
+        if unknown:
+            return Response(
+                {"detail": f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(DASHBOARD_SECTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+    else:
+        sections = set(DASHBOARD_SECTIONS)
+
+    enrollments = list(
+        Enrollment.objects
+        .filter(student=request.user, status="ACTIVE")
+        .select_related("course", "cohort")
+        .order_by("course__title")
+    )
+    course_ids = [e.course_id for e in enrollments]
+
+    subs_by_course = defaultdict(list)
+    if course_ids:
+        submissions = (
+            Submission.objects
+            .filter(student=request.user, assignment__module__course_id__in=course_ids)
+            .select_related("assignment", "assignment__module", "grade")
+            .order_by("assignment__module__order", "assignment__id")
+        )
+        for s in submissions:
+            subs_by_course[s.assignment.module.course_id].append(s)
+
+    assignments_by_course = defaultdict(list)
+    if course_ids and "assignments" in sections:
+        assignments = (
+            Assignment.objects
+            .filter(module__course_id__in=course_ids)
+            .select_related("module")
+            .order_by("module__order", "id")
+        )
+        for a in assignments:
+            assignments_by_course[a.module.course_id].append(a)
+
+    courses = []
+    for e in enrollments:
+        subs = subs_by_course[e.course_id]
+        item = {
+            "course_id": e.course.id,
+            "course_title": e.course.title,
+            "course_description": getattr(e.course, "description", "") or "",
+            "cohort": {"id": e.cohort.id, "name": e.cohort.name},
+        }
+
+        if "assignments" in sections:
+            sub_map = {s.assignment_id: s for s in subs}
+            item["assignments"] = [assignment_item(a, sub_map.get(a.id)) for a in assignments_by_course[e.course_id]]
+
+        if sections & {"grades", "summary"}:
+            grades, average, result = course_grade_summary(subs, e.course)
+            if "grades" in sections:
+                item["grades"] = grades
+            if "summary" in sections:
+                item["average_percent"] = average
+                item["result"] = result
+                item["pass_mark"] = e.course.pass_mark
+
+        courses.append(item)
+
+    return Response({"courses": courses})
+
+
+def assignment_item(a, s=None):
+    """Assignment row with the student's submission `s` (if any)."""
+    # Try to read due date safely (your model might use due_date or due_at)
+    due = getattr(a, "due_date", None) or getattr(a, "due_at", None)
+
+    return {
+        "assignment_id": a.id,
+        "module_title": a.module.title,
+        "assignment_title": a.title,
+        "max_score": a.max_score,
+        "due_date": due,
+        "has_submission": s is not None,
+        "submission": None if not s else {
+            "id": s.id,
+            "file_url": getattr(s, "file_url", "") or "",
+            "status": getattr(s, "status", "") or "",
+            "submitted_at": getattr(s, "submitted_at", None),
+        }
+    }
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def course_assignments(request):
@@ -53,33 +176,14 @@ def course_assignments(request):
     subs = Submission.objects.filter(student=request.user, assignment__in=assignments)
     sub_map = {s.assignment_id: s for s in subs}
 
-    data = []
-    for a in assignments:
-        s = sub_map.get(a.id)
-
-        # Try to read due date safely (your model might use due_date or due_at)
-        due = getattr(a, "due_date", None) or getattr(a, "due_at", None)
-
-        data.append({
-            "assignment_id": a.id,
-            "module_title": a.module.title,
-            "assignment_title": a.title,
-            "max_score": a.max_score,
-            "due_date": due,
-            "has_submission": s is not None,
-            "submission": None if not s else {
-                "id": s.id,
-                "file_url": getattr(s, "file_url", "") or "",
-                "status": getattr(s, "status", "") or "",
-                "submitted_at": getattr(s, "submitted_at", None),
-            }
-        })
+    data = [assignment_item(a, sub_map.get(a.id)) for a in assignments]
 
     return Response({"assignments": data})
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([SubmitAssignmentThrottle])
 def submit_assignment(request, assignment_id: int):
     """
     Submit a file URL for an assignment.
@@ -109,10 +213,9 @@ def submit_assignment(request, assignment_id: int):
     now = timezone.now()
     due = getattr(assignment, "due_date", None) or getattr(assignment, "due_at", None)
 
-    # Default status labels (match your admin choices if different)
-    status_value = "On Time"
+    status_value = Submission.Status.ON_TIME
     if due and now > due:
-        status_value = "Late"
+        status_value = Submission.Status.LATE
 
     submission = Submission.objects.create(
         assignment=assignment,
@@ -131,3 +234,21 @@ def submit_assignment(request, assignment_id: int):
             "submitted_at": getattr(submission, "submitted_at", None),
         }
     }, status=status.HTTP_201_CREATED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def my_transcripts(request):
+    """
+    Transcripts from archived (finished) cohorts, newest cohort first.
+    Optional: course_id.
+    """
+    qs = ArchivedTranscript.objects.filter(student=request.user).order_by("-cohort__end_date", "course_title")
+    course_id = request.query_params.get("course_id")
+    if course_id:
+        try:
+            qs = qs.filter(course_id=int(course_id))
+        except ValueError:
+            return Response({"detail": "course_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"transcripts": [transcript_record(t) for t in qs]})
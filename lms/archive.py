@@ -0,0 +1,227 @@
+"""
+Move finished cohorts out of the live tables.
+
+A cohort is archivable once its end_date is more than
+ARCHIVE_RETENTION_DAYS in the past. Each of its enrollments becomes one
+ArchivedTranscript row (enrollment, submissions with grades, and the course
+average/result from lms/grading.py), then the Enrollment, Submission and
+Grade rows are deleted. Enrollments are processed in chunks, one
+transaction each, so a run can be stopped and simply started again.
+
+Submissions belong to (student, assignment), not to a cohort: if the
+student is also enrolled in the course through another cohort, the
+transcript gets a copy and the live submissions stay until that enrollment
+is archived too.
+
+Rollup rows are refreshed once before archiving starts and are frozen from
+then on (lms/rollups.py skips archived cohorts).
+"""
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .grading import course_results
+from .models import ArchivedTranscript, Cohort, CohortCourseRollup, Enrollment, Grade, Submission, SubmissionSearch
+from .response_cache import bump_on_commit
+from .rollups import mark_dirty, mark_rows_dirty, refresh_rollups
+
+CHUNK_SIZE = 500
+
+
+def cutoff_date(now=None, days=None):
+    if days is None:
+        days = settings.ARCHIVE_RETENTION_DAYS
+    return (now or timezone.now()).date() - timedelta(days=days)
+
+
+def archivable_cohorts(cutoff):
+    """Cohorts that ended before `cutoff` and still have live enrollments."""
+    return (
+        Cohort.objects
+        .filter(end_date__lt=cutoff, enrollments__isnull=False)
+        .distinct()
+        .order_by("end_date", "id")
+    )
+
+
+def transcript_record(t) -> dict:
+    """API / NDJSON shape of an ArchivedTranscript."""
+    return {
+        "cohort_id": t.cohort_id,
+        "course_id": t.course_id,
+        "course_title": t.course_title,
+        "student_id": t.student_id,
+        "student_email": t.student_email,
+        "enrollment_status": t.enrollment_status,
+        "enrolled_at": t.enrolled_at,
+        "average_percent": t.average_percent,
+        "result": t.result,
+        "submissions": t.submissions,
+        "archived_at": t.archived_at,
+    }
+
+
+def build_transcripts(cohort, enrollments, now):
+    """
+    (transcripts, submission_ids_to_delete) for a chunk of the cohort's
+    enrollments (student and course loaded). A few queries per chunk plus
+    one grade-engine pass per course in it.
+    """
+    students_by_course = defaultdict(list)
+    for e in enrollments:
+        students_by_course[e.course_id].append(e.student_id)
+    student_ids = {e.student_id for e in enrollments}
+
+    # (student, course) pairs still enrolled elsewhere keep their live submissions
+    shared = set(
+        Enrollment.objects
+        .filter(student_id__in=student_ids, course_id__in=students_by_course)
+        .exclude(cohort=cohort)
+        .values_list("student_id", "course_id")
+    )
+
+    subs = defaultdict(list)
+    for s in (
+        Submission.objects
+        .filter(student_id__in=student_ids, assignment__module__course_id__in=students_by_course)
+        .order_by("assignment__module__order", "assignment_id")
+        .values(
+            "id", "student_id", "assignment_id", "status", "file_url", "submitted_at",
+            course_id=F("assignment__module__course_id"),
+            assignment_title=F("assignment__title"),
+            module_title=F("assignment__module__title"),
+            max_score=F("assignment__max_score"),
+            score=F("grade__score"),
+            feedback=F("grade__feedback"),
+            locked=F("grade__locked"),
+            locked_at=F("grade__locked_at"),
+            locked_by=F("grade__locked_by__email"),
+        )
+    ):
+        subs[(s["student_id"], s["course_id"])].append(s)
+
+    results = {
+        course_id: course_results(course_id, student_ids=ids)
+        for course_id, ids in students_by_course.items()
+    }
+
+    transcripts, delete_ids = [], []
+    for e in enrollments:
+        key = (e.student_id, e.course_id)
+        rows = subs.get(key, [])
+        if key not in shared:
+            delete_ids.extend(s["id"] for s in rows)
+
+        averages, policy = results[e.course_id]
+        average = averages.get(e.student_id)
+        transcripts.append(ArchivedTranscript(
+            cohort=cohort,
+            course_id=e.course_id,
+            course_title=e.course.title,
+            student_id=e.student_id,
+            student_email=e.student.email or e.student.username,
+            enrollment_status=e.status,
+            enrolled_at=e.enrolled_at,
+            average_percent=average,
+            result=policy.result(average) or "",
+            submissions=[
+                {
+                    "submission_id": s["id"],
+                    "assignment_id": s["assignment_id"],
+                    "assignment_title": s["assignment_title"],
+                    "module_title": s["module_title"],
+                    "max_score": s["max_score"],
+                    "status": s["status"],
+                    "file_url": s["file_url"],
+                    "submitted_at": s["submitted_at"],
+                    "grade": None if s["score"] is None else {
+                        "score": s["score"],
+                        "feedback": s["feedback"],
+                        "locked": s["locked"],
+                        "locked_at": s["locked_at"],
+                        "locked_by": s["locked_by"],
+                    },
+                }
+                for s in rows
+            ],
+            archived_at=now,
+        ))
+    return transcripts, delete_ids
+
+
+def archive_cohort(cohort, chunk_size=CHUNK_SIZE, snapshot=None) -> int:
+    """
+    Archive every live enrollment of `cohort`. `snapshot`, if given, is a
+    text file object that gets one NDJSON line per transcript; lines are
+    written before each chunk commits, so a chunk that fails is written
+    again by the next run. Returns the number of enrollments archived.
+    """
+    if cohort.archived_at is None:
+        # last refresh with live data, then the rollup rows are frozen
+        for course_id in set(cohort.enrollments.values_list("course_id", flat=True)):
+            mark_dirty(cohort.id, course_id)
+        refresh_rollups()
+        cohort.archived_at = timezone.now()
+        Cohort.objects.filter(pk=cohort.pk).update(archived_at=cohort.archived_at)
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            # archived rows are deleted, so the next chunk is always the first
+            chunk = list(
+                Enrollment.objects
+                .select_for_update(of=("self",))
+                .filter(cohort=cohort)
+                .select_related("student", "course")
+                .order_by("id")[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            transcripts, submission_ids = build_transcripts(cohort, chunk, timezone.now())
+            ArchivedTranscript.objects.bulk_create(transcripts)
+            if snapshot is not None:
+                for t in transcripts:
+                    snapshot.write(json.dumps(transcript_record(t), cls=DjangoJSONEncoder) + "\n")
+
+            delete_chunk(cohort, chunk, submission_ids)
+        archived += len(chunk)
+
+    # anything that flagged these meanwhile: the figures are final
+    CohortCourseRollup.objects.filter(cohort=cohort).update(dirty=False)
+    return archived
+
+
+def delete_rows(model, column, ids):
+    """DELETE FROM <model's table> WHERE <column> IN (ids), in CHUNK_SIZE slices."""
+    ids = list(ids)
+    qn = connection.ops.quote_name
+    sql = f"DELETE FROM {qn(model._meta.db_table)} WHERE {qn(model._meta.get_field(column).column)} IN "
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), CHUNK_SIZE):
+            part = ids[start:start + CHUNK_SIZE]
+            cursor.execute(sql + f"({', '.join(['%s'] * len(part))})", part)
+
+
+def delete_chunk(cohort, enrollments, submission_ids):
+    """
+    Plain SQL deletes, children first: a queryset delete() would fetch every
+    row and fire the per-row rollup/search/cache receivers in lms/signals.py
+    (thousands of queries per chunk, inside the transaction holding the
+    locks). Their work is done here once for the whole chunk instead.
+    GradeEvent history is kept.
+    """
+    delete_rows(SubmissionSearch, "submission", submission_ids)
+    delete_rows(Grade, "submission", submission_ids)
+    delete_rows(Submission, "id", submission_ids)
+    delete_rows(Enrollment, "id", [e.id for e in enrollments])
+
+    course_ids = {e.course_id for e in enrollments}
+    mark_rows_dirty(CohortCourseRollup.objects.filter(course_id__in=course_ids).exclude(cohort=cohort))
+    bump_on_commit(course_ids)
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.db.models import F
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import UserTokenVersion
+
+TOKEN_VERSION_CLAIM = "ver"
+COHORT_CLAIM = "cohort_id"
+
+# User fields copied into the token. Anything else on request.user is
+# deferred and loaded from the DB only if a view actually reads it.
+USER_CLAIM_FIELDS = ("email", "is_staff")
+
+
+def _token_version_key(user_id) -> str:
+    return f"lms:jwt-ver:{user_id}"
+
+
+def stored_token_version(user_id) -> int:
+    """The version from the DB, refreshing this worker's cached copy."""
+    version = (
+        UserTokenVersion.objects
+        .filter(user_id=user_id)
+        .values_list("version", flat=True)
+        .first()
+    ) or 0
+    cache.set(_token_version_key(user_id), version, getattr(settings, "JWT_TOKEN_VERSION_CACHE_SECONDS", 60))
+    return version
+
+
+def get_token_version(user_id) -> int:
+    """The version tokens are checked against; cached per worker."""
+    version = cache.get(_token_version_key(user_id))
+    if version is None:
+        version = stored_token_version(user_id)
+    return version
+
+
+def revoke_user_tokens(user) -> None:
+    """
+    Invalidate every token issued to `user` so far. lms/signals.py calls this
+    when a user's is_active or is_staff changes through save(); call it
+    yourself after a queryset update() of those fields.
+    """
+    UserTokenVersion.objects.get_or_create(user=user)
+    UserTokenVersion.objects.filter(user=user).update(version=F("version") + 1)
+    cache.delete(_token_version_key(user.pk))
+
+
+def add_user_claims(token, user, cohort_id=None):
+    for field in USER_CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[COHORT_CLAIM] = cohort_id
+    # never from the cache: a copy from before a revoke on another worker
+    # would make this fresh token look revoked
+    token[TOKEN_VERSION_CLAIM] = stored_token_version(user.pk)
+    return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds request.user from token claims instead of
+    loading the User row on every request.
+
+    The user is a real (unsaved-looking) model instance whose claim fields are
+    populated and every other field is deferred, so FK filters and assignments
+    work as usual and only views touching e.g. `username` pay for a query.
+    Tokens issued before claims were added fall back to the full DB load.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        token_version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        version = get_token_version(user_id)
+        if token_version > version:
+            # issued after a revoke this worker hasn't seen yet (versions only grow)
+            version = stored_token_version(user_id)
+        if token_version != version:
+            raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+
+        if any(field not in validated_token for field in USER_CLAIM_FIELDS):
+            user = super().get_user(validated_token)
+        else:
+            user = self.user_from_claims(user_id, validated_token)
+
+        user.cohort_id = validated_token.get(COHORT_CLAIM)
+        return user
+
+    def user_from_claims(self, user_id, validated_token):
+        User = get_user_model()
+        # simplejwt serializes the id claim as a string
+        user_id = User._meta.get_field(api_settings.USER_ID_FIELD).to_python(user_id)
+        claims = {api_settings.USER_ID_FIELD: user_id}
+        claims.update({f: validated_token[f] for f in USER_CLAIM_FIELDS})
+
+        # from_db() expects values in concrete field order
+        field_names = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+        return User.from_db(router.db_for_read(User), field_names, [claims[f] for f in field_names])
@@ -0,0 +1,179 @@
+"""
+Grade/lock event fan-out for the SSE stream (see lms/stream.py).
+
+The default broker is in-process: fine for a single ASGI worker. With
+several workers set LMS_EVENTS_BACKEND = "postgres" so events published in
+one process are relayed to subscribers in every other via LISTEN/NOTIFY.
+NOTIFY payloads are capped at 8000 bytes, so only the submission id and
+event type travel through PostgreSQL; the listener re-reads the grade.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+PG_CHANNEL = "lms_events"
+QUEUE_SIZE = 100
+LISTEN_MAX_BACKOFF = 60
+
+
+def grade_event(grade, event_type: str) -> dict:
+    return {
+        "type": event_type,
+        "submission_id": grade.submission_id,
+        "assignment_id": grade.submission.assignment_id,
+        "score": grade.score,
+        "feedback": grade.feedback,
+        "locked": grade.locked,
+        "locked_at": grade.locked_at,
+    }
+
+
+def load_grade_event(submission_id, event_type: str):
+    """grade_event() for the grade as currently stored, or None if it's gone."""
+    from .models import Grade
+
+    grade = Grade.objects.select_related("submission").filter(submission_id=submission_id).first()
+    return None if grade is None else grade_event(grade, event_type)
+
+
+class LocalBroker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id) -> asyncio.Queue:
+        """Must be called from the event loop that will read the queue."""
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subs = self._subscribers.get(user_id, set())
+            subs.difference_update({s for s in subs if s[1] is queue})
+            if not subs:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id, event: dict):
+        """Thread-safe; called from sync code (signals) or the listener thread."""
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subs:
+            loop.call_soon_threadsafe(self._deliver, queue, event)
+
+    def has_subscribers(self, user_id) -> bool:
+        with self._lock:
+            return bool(self._subscribers.get(user_id))
+
+    @staticmethod
+    def _deliver(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # slow client: drop rather than grow without bound, it can refetch me/grades/
+            pass
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Publishes with pg_notify (delivered on commit) and relays notifications
+    to local subscribers from a single background LISTEN connection.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, event):
+        payload = json.dumps({"user_id": user_id, "type": event["type"], "submission_id": event["submission_id"]})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [PG_CHANNEL, payload])
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="lms-events-listen", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        """Keep a LISTEN connection up, reconnecting with backoff on errors."""
+        delay = 1
+        while True:
+            connected_at = time.monotonic()
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception("LISTEN %s connection failed, reconnecting in %ss", PG_CHANNEL, delay)
+            # a connection that stayed up a while resets the backoff
+            if time.monotonic() - connected_at > LISTEN_MAX_BACKOFF:
+                delay = 1
+            time.sleep(delay)
+            delay = min(delay * 2, LISTEN_MAX_BACKOFF)
+
+    def _listen_once(self):
+        import psycopg2
+
+        db = settings.DATABASES["default"]
+        conn = psycopg2.connect(
+            dbname=db["NAME"], user=db.get("USER"), password=db.get("PASSWORD"),
+            host=db.get("HOST") or None, port=db.get("PORT") or None,
+        )
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {PG_CHANNEL}")
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._relay(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+    def _relay(self, payload):
+        try:
+            msg = json.loads(payload)
+            user_id, event_type, submission_id = msg["user_id"], msg["type"], msg["submission_id"]
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Bad %s payload: %r", PG_CHANNEL, payload)
+            return
+        if not self.has_subscribers(user_id):
+            return
+        close_old_connections()
+        try:
+            event = load_grade_event(submission_id, event_type)
+        except Exception:
+            logger.exception("Could not load %s event for submission %s", event_type, submission_id)
+            return
+        if event is not None:
+            LocalBroker.publish(self, user_id, event)
+
+
+BACKENDS = {
+    "local": LocalBroker,
+    "postgres": PostgresBroker,
+}
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = BACKENDS[getattr(settings, "LMS_EVENTS_BACKEND", "local")]()
+    return _broker
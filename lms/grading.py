@@ -0,0 +1,286 @@
+"""
+Course grade computation shared by the student views, the lecturer export
+and the cohort rollups.
+
+A student's course average is the weighted mean of their assignment
+percents, weighting each assignment by `assignment.weight * module.weight`.
+With every weight at its default of 1 this is the plain mean me/grades/ has
+always returned. Per course policy (Course fields):
+
+- late work loses `late_penalty` percent, or scores 0 when the assignment
+  does not `allow_late`;
+- MISSING submissions count as 0, other ungraded work is not counted;
+- the `drop_lowest` lowest percents are ignored (at least one is kept).
+
+Whole courses are computed as a students x assignments matrix with NumPy
+when it is installed, otherwise with a pure-Python loop that gives the
+same results. NumPy is imported on first use, not at import time.
+"""
+
+from django.db import connections
+from django.db.models import BooleanField, Case, F, FloatField, Q, Value, When
+
+PASS_MARK = 70.0
+
+# "Late" is what older submit_assignment versions stored
+LATE_STATUSES = frozenset({"LATE", "Late"})
+MISSING_STATUSES = frozenset({"MISSING"})
+
+_numpy = None
+
+
+def get_numpy():
+    """The numpy module, or None if it isn't installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # optional dependency
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+class GradingPolicy:
+    def __init__(self, pass_mark=PASS_MARK, drop_lowest=0, late_penalty=0.0):
+        self.pass_mark = float(pass_mark)
+        self.drop_lowest = int(drop_lowest or 0)
+        # the model validators keep these in range; clamp for rows saved
+        # without full_clean() (shell, update())
+        self.late_penalty = min(max(float(late_penalty or 0.0), 0.0), 100.0)
+
+    @classmethod
+    def for_course(cls, course):
+        return cls(course.pass_mark, course.drop_lowest, course.late_penalty)
+
+    def result(self, average):
+        if average is None:
+            return None
+        return "PASS" if average >= self.pass_mark else "F"
+
+
+def submission_percent(score, max_score, status):
+    """Raw percent for one submission, or None if it doesn't count (yet)."""
+    if score is not None and max_score > 0:
+        return (float(score) / float(max_score)) * 100.0
+    if status in MISSING_STATUSES:
+        return 0.0
+    return None
+
+
+def compute(n_students, columns, entries, policy, detail=False, use_numpy=None):
+    """
+    Compute course averages for `n_students` rows.
+
+    columns: [(weight, allow_late), ...] one per assignment column
+    entries: (rows, cols, percents, late) parallel sequences, one item per
+             counted submission (percent from submission_percent)
+
+    Returns (averages, adjusted, dropped). averages[i] is a float or None.
+    With detail=True, adjusted[i] maps column -> percent after late rules and
+    dropped[i] is the set of dropped columns; otherwise both are None.
+    """
+    if use_numpy is None:
+        use_numpy = get_numpy() is not None
+    if use_numpy:
+        return _compute_numpy(n_students, columns, entries, policy, detail)
+    return _compute_python(n_students, columns, entries, policy, detail)
+
+
+def _compute_numpy(n_students, columns, entries, policy, detail):
+    np = get_numpy()
+    rows, cols, percents, late = entries
+    n_cols = len(columns)
+
+    P = np.full((n_students, n_cols), np.nan)
+    L = np.zeros((n_students, n_cols), dtype=bool)
+    if len(rows):
+        r = np.asarray(rows, dtype=np.intp)
+        c = np.asarray(cols, dtype=np.intp)
+        P[r, c] = np.asarray(percents, dtype=float)
+        L[r, c] = np.asarray(late, dtype=bool)
+
+    W = np.array([w for w, _ in columns], dtype=float)
+    allow_late = np.array([a for _, a in columns], dtype=bool)
+
+    if policy.late_penalty:
+        P = np.where(L & allow_late, P * (1.0 - policy.late_penalty / 100.0), P)
+    P = np.where(L & ~allow_late, 0.0, P)
+
+    graded = ~np.isnan(P)
+    dropped = np.zeros_like(graded)
+    if policy.drop_lowest and n_cols:
+        n_drop = np.minimum(policy.drop_lowest, np.maximum(graded.sum(axis=1) - 1, 0))
+        order = np.argsort(np.where(graded, P, np.inf), axis=1, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.broadcast_to(np.arange(n_cols), order.shape), axis=1)
+        dropped = graded & (ranks < n_drop[:, None])
+
+    kept = graded & ~dropped
+    weight_sum = (kept * W).sum(axis=1)
+    total = (np.where(kept, P, 0.0) * W).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.where(weight_sum > 0, total / weight_sum, np.nan)
+    averages = [None if a != a else a for a in avg.tolist()]
+
+    if not detail:
+        return averages, None, None
+
+    adjusted = [
+        {j: P[i, j].item() for j in np.flatnonzero(graded[i]).tolist()}
+        for i in range(n_students)
+    ]
+    dropped_sets = [set(np.flatnonzero(dropped[i]).tolist()) for i in range(n_students)]
+    return averages, adjusted, dropped_sets
+
+
+def _compute_python(n_students, columns, entries, policy, detail):
+    rows, cols, percents, late = entries
+    factor = 1.0 - policy.late_penalty / 100.0
+
+    adjusted = [{} for _ in range(n_students)]
+    for i, j, p, is_late in zip(rows, cols, percents, late):
+        if is_late:
+            p = p * factor if columns[j][1] else 0.0
+        adjusted[i][j] = p
+
+    averages = []
+    dropped_sets = []
+    for cells in adjusted:
+        dropped = set()
+        if policy.drop_lowest:
+            n_drop = min(policy.drop_lowest, max(len(cells) - 1, 0))
+            # ties broken by column, same as the stable argsort above
+            dropped = {j for j, _ in sorted(cells.items(), key=lambda kv: (kv[1], kv[0]))[:n_drop]}
+
+        weight_sum = total = 0.0
+        for j, p in cells.items():
+            if j in dropped:
+                continue
+            w = columns[j][0]
+            weight_sum += w
+            total += p * w
+        averages.append(total / weight_sum if weight_sum > 0 else None)
+        dropped_sets.append(dropped)
+
+    if not detail:
+        return averages, None, None
+    return averages, adjusted, dropped_sets
+
+
+def course_results(course_id, student_ids=None):
+    """
+    {student_id: average_percent or None} for everyone with a submission in
+    the course (or just `student_ids`), plus the course's GradingPolicy.
+
+    Percents and late flags are worked out in SQL and the rows are read
+    straight off the cursor (into NumPy arrays with np.fromiter when NumPy
+    is installed), so no model or per-row Python work sits between the
+    database and the vectorized pass.
+    """
+    from .models import Assignment, Course
+
+    course = Course.objects.get(pk=course_id)
+    policy = GradingPolicy.for_course(course)
+
+    assignments = list(
+        Assignment.objects
+        .filter(module__course_id=course_id)
+        .order_by("id")
+        .values_list("id", "weight", "module__weight", "allow_late")
+    )
+    columns = [(max(w * mw, 0.0), allow_late) for _, w, mw, allow_late in assignments]
+    assignment_ids = [a[0] for a in assignments]
+
+    queryset = course_cells(course_id, student_ids)
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        if get_numpy() is not None:
+            students, entries = _cells_numpy(cursor, assignment_ids)
+        else:
+            students, entries = _cells_python(cursor, assignment_ids)
+
+    averages, _, _ = compute(len(students), columns, entries, policy)
+    return dict(zip(students, averages)), policy
+
+
+def course_cells(course_id, student_ids=None):
+    """
+    One row per submission: (student_id, assignment_id, percent, counted,
+    late), with submission_percent()'s rules in SQL. percent is 0 where
+    counted is false.
+    """
+    from .models import Submission
+
+    graded = Q(grade__score__isnull=False, assignment__max_score__gt=0)
+    missing = Q(status__in=MISSING_STATUSES)
+    subs = Submission.objects.filter(assignment__module__course_id=course_id)
+    if student_ids is not None:
+        subs = subs.filter(student_id__in=student_ids)
+    return subs.annotate(
+        percent=Case(
+            When(graded, then=F("grade__score") / F("assignment__max_score") * 100.0),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        counted=Case(When(graded | missing, then=Value(True)), default=Value(False), output_field=BooleanField()),
+        late=Case(When(status__in=LATE_STATUSES, then=Value(True)), default=Value(False), output_field=BooleanField()),
+    ).values_list("student_id", "assignment_id", "percent", "counted", "late")
+
+
+def _cells_numpy(cursor, assignment_ids):
+    np = get_numpy()
+    cells = np.fromiter(
+        cursor,
+        dtype=[("student", np.int64), ("assignment", np.int64), ("percent", float), ("counted", bool), ("late", bool)],
+    )
+    students, rows = np.unique(cells["student"], return_inverse=True)
+    # assignment_ids is sorted, so the column is its position
+    cols = np.searchsorted(np.asarray(assignment_ids, dtype=np.int64), cells["assignment"])
+    counted = cells["counted"]
+    return students.tolist(), (rows[counted], cols[counted], cells["percent"][counted], cells["late"][counted])
+
+
+def _cells_python(cursor, assignment_ids):
+    col_of = {a: j for j, a in enumerate(assignment_ids)}
+    row_of = {}
+    rows, cols, percents, late = [], [], [], []
+    for student_id, assignment_id, percent, counted, is_late in cursor:
+        i = row_of.setdefault(student_id, len(row_of))
+        if not counted:
+            continue
+        rows.append(i)
+        cols.append(col_of[assignment_id])
+        percents.append(percent)
+        late.append(bool(is_late))
+    return list(row_of), (rows, cols, percents, late)
+
+
+def student_breakdown(submissions, policy):
+    """
+    Single-student detail for views. `submissions` must have assignment,
+    assignment__module and grade loaded. Returns (average, rows) where rows
+    line up with `submissions` as (raw_percent, adjusted_percent, dropped).
+    """
+    columns = []
+    rows, cols, percents, late = [], [], [], []
+    raw = []
+    for j, s in enumerate(submissions):
+        a = s.assignment
+        grade = getattr(s, "grade", None)
+        columns.append((max(a.weight * a.module.weight, 0.0), a.allow_late))
+        percent = submission_percent(None if grade is None else grade.score, a.max_score, s.status)
+        raw.append(percent)
+        if percent is not None:
+            rows.append(0)
+            cols.append(j)
+            percents.append(percent)
+            late.append(s.status in LATE_STATUSES)
+
+    # one row: the NumPy setup costs more than it saves
+    averages, adjusted, dropped = compute(1, columns, (rows, cols, percents, late), policy, detail=True, use_numpy=False)
+    return averages[0], [
+        (raw[j], adjusted[0].get(j), j in dropped[0])
+        for j in range(len(columns))
+    ]
@@ -1,9 +1,21 @@
+import csv
+
+from django.db import transaction
+from django.http import HttpResponse
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Submission, Grade
+from .archive import transcript_record
+from .grading import course_results
+from .models import (
+    Submission, Grade, GradeEvent, CohortCourseRollup, Assignment, Course, Enrollment, ArchivedTranscript, grade_diff,
+)
+from .pagination import DEFAULT_LIMIT, CursorError, keyset_page, parse_limit
+from .response_cache import cache_enabled, get_cached, set_cached, submissions_key, stats as response_cache_stats
+from .search import search_submissions
 
 
 def require_staff(user):
@@ -13,23 +25,63 @@ def require_staff(user):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def lecturer_submissions(request):
+    """
+    Submissions for a course, newest first.
+    Optional: assignment_id, q (search student/assignment/module/feedback),
+    limit + cursor for keyset pagination (all rows when limit is omitted).
+    Paginated responses (limit/cursor) without q are cached per course
+    generation (lms/response_cache.py); the X-Cache header says HIT, MISS or
+    BYPASS. Full course lists are never cached: the cache bounds entries, not
+    their size. Nothing is cached while the cache is disabled (see
+    LECTURER_CACHE_ENABLED).
+    """
     if not require_staff(request.user):
         return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
 
     course_id = request.query_params.get("course_id")
     assignment_id = request.query_params.get("assignment_id")
+    query = (request.query_params.get("q") or "").strip()
+    cursor = request.query_params.get("cursor")
 
     if not course_id:
         return Response({"detail": "course_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        limit = parse_limit(request.query_params.get("limit"))
+    except CursorError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # normalized so "01" and "1" share one cache entry and one generation
+        course_id = int(course_id)
+        assignment_id = int(assignment_id) if assignment_id else None
+    except ValueError:
+        return Response({"detail": "course_id and assignment_id must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+    cache_key = None
+    if (limit or cursor) and not query and cache_enabled():
+        cache_key = submissions_key(course_id, assignment_id, cursor, limit)
+        payload = get_cached(cache_key)
+        if payload is not None:
+            return Response(payload, headers={"X-Cache": "HIT"})
+
     qs = (
         Submission.objects
         .filter(assignment__module__course_id=course_id)
         .select_related("student", "assignment", "assignment__module")
-        .order_by("-submitted_at")
+        .order_by("-submitted_at", "-id")
     )
     if assignment_id:
         qs = qs.filter(assignment_id=assignment_id)
+    if query:
+        qs = search_submissions(qs, query)
+
+    next_cursor = None
+    if limit or cursor:
+        try:
+            qs, next_cursor = keyset_page(qs, cursor, limit or DEFAULT_LIMIT)
+        except CursorError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     grades = Grade.objects.filter(submission__in=qs).select_related("locked_by")
     grade_map = {g.submission_id: g for g in grades}
@@ -58,7 +110,23 @@ def lecturer_submissions(request):
             }
         })
 
-    return Response({"submissions": items})
+    payload = {"submissions": items, "next_cursor": next_cursor}
+    if cache_key:
+        set_cached(cache_key, payload)
+    return Response(payload, headers={"X-Cache": "MISS" if cache_key else "BYPASS"})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def lecturer_cache_stats(request):
+    """
+    Hit/miss counters of the lecturer_submissions response cache, shared by
+    every worker; `enabled` is false when caching is off.
+    """
+    if not require_staff(request.user):
+        return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+
+    return Response(response_cache_stats())
 
 
 @api_view(["POST"])
@@ -87,18 +155,26 @@ def grade_submission(request, submission_id: int):
     if score < 0 or score > max_score:
         return Response({"detail": f"score must be between 0 and {max_score}"}, status=status.HTTP_400_BAD_REQUEST)
 
-    grade = Grade.objects.filter(submission=submission).first()
+    with transaction.atomic():
+        # row lock: a concurrent lock/finalize either lands first (and we see
+        # locked=True) or waits for this edit to commit
+        grade = Grade.objects.select_for_update().filter(submission=submission).first()
 
-    # ✅ If locked, do not allow edits
-    if grade and grade.locked:
-        return Response({"detail": "Grade is locked (FINAL). Cannot edit."}, status=status.HTTP_409_CONFLICT)
+        # ✅ If locked, do not allow edits
+        if grade and grade.locked:
+            return Response({"detail": "Grade is locked (FINAL). Cannot edit."}, status=status.HTTP_409_CONFLICT)
 
-    if not grade:
-        grade = Grade.objects.create(submission=submission, score=score, feedback=feedback)
-    else:
-        grade.score = score
-        grade.feedback = feedback
-        grade.save()
+        after = {"score": score, "feedback": feedback}
+        if not grade:
+            grade = Grade.objects.create(submission=submission, **after)
+            GradeEvent.record(submission.id, request.user, GradeEvent.Action.CREATE, grade_diff({}, after))
+        else:
+            diff = grade_diff({"score": grade.score, "feedback": grade.feedback}, after)
+            grade.score = score
+            grade.feedback = feedback
+            grade.save()
+            if diff:
+                GradeEvent.record(submission.id, request.user, GradeEvent.Action.UPDATE, diff)
 
     return Response({
         "detail": "Graded successfully ✅",
@@ -120,9 +196,234 @@ def lock_grade(request, submission_id: int):
     if not grade:
         return Response({"detail": "Grade not found. Grade first, then lock."}, status=status.HTTP_404_NOT_FOUND)
 
-    if grade.locked:
+    # same conditional UPDATE as finalize, so a racing lock is a no-op
+    if grade.locked or not Grade.objects.filter(pk=grade.pk).lock(by_user=request.user):
         return Response({"detail": "Already locked."}, status=status.HTTP_200_OK)
 
-    grade.lock(by_user=request.user)
-
     return Response({"detail": "Grade locked (FINAL) ✅"})
+
+
+BLOCKING_PREVIEW = 50
+
+
+def finalize_grades(request, submissions):
+    """
+    Lock every unlocked grade among `submissions` in one UPDATE.
+    Ungraded submissions block finalization unless the body has force=true,
+    in which case the graded ones are locked and the rest still reported.
+    """
+    force = str(request.data.get("force", "")).lower() in ("1", "true", "yes")
+
+    ungraded = submissions.filter(grade__isnull=True)
+    blocking_count = ungraded.count()
+    blocking = [
+        {
+            "submission_id": s["id"],
+            "student_email": s["student__email"] or s["student__username"],
+            "assignment_id": s["assignment_id"],
+            "assignment_title": s["assignment__title"],
+        }
+        for s in ungraded.order_by("assignment_id", "id").values(
+            "id", "student__email", "student__username", "assignment_id", "assignment__title"
+        )[:BLOCKING_PREVIEW]
+    ]
+
+    if blocking_count and not force:
+        return Response({
+            "detail": f"{blocking_count} submission(s) are not graded yet. Grade them or pass force=true.",
+            "locked": 0,
+            "blocking_count": blocking_count,
+            "blocking": blocking,
+        }, status=status.HTTP_409_CONFLICT)
+
+    locked = Grade.objects.filter(submission__in=submissions).lock(by_user=request.user)
+
+    return Response({
+        "detail": f"Locked {locked} grade(s) (FINAL) ✅",
+        "locked": locked,
+        "blocking_count": blocking_count,
+        "blocking": blocking,
+    })
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def finalize_assignment(request, assignment_id: int):
+    if not require_staff(request.user):
+        return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+
+    if not Assignment.objects.filter(pk=assignment_id).exists():
+        return Response({"detail": "Assignment not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    return finalize_grades(request, Submission.objects.filter(assignment_id=assignment_id))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def finalize_course(request, course_id: int):
+    if not require_staff(request.user):
+        return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+
+    if not Course.objects.filter(pk=course_id).exists():
+        return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    return finalize_grades(request, Submission.objects.filter(assignment__module__course_id=course_id))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def grade_history(request, submission_id: int):
+    """
+    Grade change history for one submission, oldest first.
+    """
+    if not require_staff(request.user):
+        return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+
+    events = (
+        GradeEvent.objects
+        .filter(submission_id=submission_id)
+        .select_related("actor")
+        .order_by("created_at", "id")
+    )
+
+    return Response({"history": [
+        {
+            "action": e.get_action_display(),
+            "changes": e.diff,
+            "by": getattr(e.actor, "email", None) if e.actor else None,
+            "at": e.created_at,
+        }
+        for e in events
+    ]})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def cohort_rollups(request):
+    """
+    Enrollment, completion and pass/fail counts per cohort and course,
+    read from the precomputed CohortCourseRollup table.
+    Optional filters: cohort_id, course_id.
+    """
+    if not require_staff(request.user):
+        return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+
+    qs = (
+        CohortCourseRollup.objects
+        .select_related("cohort", "course")
+        .order_by("cohort__name", "course__title")
+    )
+    try:
+        cohort_id = int(request.query_params.get("cohort_id") or 0) or None
+        course_id = int(request.query_params.get("course_id") or 0) or None
+    except ValueError:
+        return Response({"detail": "cohort_id and course_id must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    if cohort_id:
+        qs = qs.filter(cohort_id=cohort_id)
+    if course_id:
+        qs = qs.filter(course_id=course_id)
+
+    items = []
+    for r in qs:
+        enrolled = r.enrolled_count
+        graded = r.passed_count + r.failed_count
+        items.append({
+            "cohort": {"id": r.cohort.id, "name": r.cohort.name},
+            "course": {"id": r.course.id, "title": r.course.title},
+            "enrolled": enrolled,
+            "active": r.active_count,
+            "completed": r.completed_count,
+            "dropped": r.dropped_count,
+            "completion_rate": (r.completed_count / enrolled * 100.0) if enrolled else None,
+            "passed": r.passed_count,
+            "failed": r.failed_count,
+            "pass_rate": (r.passed_count / graded * 100.0) if graded else None,
+            "stale": r.dirty,
+            "refreshed_at": r.refreshed_at,
+        })
+
+    return Response({"rollups": items})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_course_grades(request):
+    """
+    CSV of every enrolled student's course average and result, computed by
+    the same engine as me/grades/ (lms/grading.py).
+    """
+    if not require_staff(request.user):
+        return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+
+    course_id = request.query_params.get("course_id")
+    if not course_id:
+        return Response({"detail": "course_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        course_id = int(course_id)
+    except ValueError:
+        return Response({"detail": "course_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if not Course.objects.filter(pk=course_id).exists():
+        return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    averages, policy = course_results(course_id)
+    enrollments = (
+        Enrollment.objects
+        .filter(course_id=course_id)
+        .select_related("student", "cohort")
+        .order_by("cohort__name", "student__email")
+    )
+
+    response = HttpResponse(content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="course-{course_id}-grades.csv"'
+    writer = csv.writer(response)
+    writer.writerow(["student_email", "cohort", "enrollment_status", "average_percent", "result"])
+    for e in enrollments:
+        avg = averages.get(e.student_id)
+        writer.writerow([
+            e.student.email or e.student.username,
+            e.cohort.name,
+            e.status,
+            "" if avg is None else f"{avg:.2f}",
+            policy.result(avg) or "",
+        ])
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def archived_transcripts(request):
+    """
+    Read-only transcripts of archived cohorts (see lms/archive.py).
+    Filters (at least one): cohort_id, course_id, student_email.
+    limit + cursor page by id (default limit 50).
+    """
+    if not require_staff(request.user):
+        return Response({"detail": "Staff only."}, status=status.HTTP_403_FORBIDDEN)
+
+    filters = {}
+    for param, lookup in (("cohort_id", "cohort_id"), ("course_id", "course_id"), ("student_email", "student_email__iexact")):
+        value = request.query_params.get(param)
+        if value:
+            filters[lookup] = value
+    try:
+        for lookup in ("cohort_id", "course_id"):
+            if lookup in filters:
+                filters[lookup] = int(filters[lookup])
+    except ValueError:
+        return Response({"detail": "cohort_id and course_id must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    if not filters:
+        return Response({"detail": "cohort_id, course_id or student_email is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = parse_limit(request.query_params.get("limit")) or DEFAULT_LIMIT
+        cursor = int(request.query_params.get("cursor") or 0)
+    except (CursorError, ValueError):
+        return Response({"detail": "Invalid limit or cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = list(ArchivedTranscript.objects.filter(id__gt=cursor, **filters).order_by("id")[:limit + 1])
+    next_cursor = str(rows[limit - 1].id) if len(rows) > limit else None
+
+    return Response({
+        "transcripts": [transcript_record(t) for t in rows[:limit]],
+        "next_cursor": next_cursor,
+    })
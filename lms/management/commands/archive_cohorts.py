@@ -0,0 +1,52 @@
+import gzip
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from lms.archive import CHUNK_SIZE, archivable_cohorts, archive_cohort, cutoff_date
+
+
+class Command(BaseCommand):
+    help = "Move enrollments, submissions and grades of finished cohorts into ArchivedTranscript (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Retention after end_date (default ARCHIVE_RETENTION_DAYS).")
+        parser.add_argument("--cohort", type=int, action="append", help="Archive only this cohort id (repeatable).")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Enrollments per transaction.")
+        parser.add_argument("--snapshot-dir", help="Also write a gzipped NDJSON snapshot per cohort here.")
+        parser.add_argument("--dry-run", action="store_true", help="List the cohorts that would be archived.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = cutoff_date(now, options["days"])
+        cohorts = archivable_cohorts(cutoff)
+        if options["cohort"]:
+            cohorts = cohorts.filter(id__in=options["cohort"])
+        cohorts = list(cohorts)
+
+        snapshot_dir = None
+        if options["snapshot_dir"]:
+            snapshot_dir = Path(options["snapshot_dir"])
+            if not snapshot_dir.is_dir():
+                raise CommandError(f"{snapshot_dir} is not a directory.")
+
+        if not cohorts:
+            self.stdout.write(f"No cohorts ended before {cutoff} with live data.")
+            return
+
+        for cohort in cohorts:
+            if options["dry_run"]:
+                n = cohort.enrollments.count()
+                self.stdout.write(f"{cohort.name} (ended {cohort.end_date}): would archive {n} enrollment(s)")
+                continue
+
+            if snapshot_dir is None:
+                n = archive_cohort(cohort, chunk_size=options["chunk_size"])
+                self.stdout.write(self.style.SUCCESS(f"{cohort.name}: archived {n} enrollment(s)."))
+                continue
+
+            path = snapshot_dir / f"cohort-{cohort.id}-{now:%Y%m%d%H%M%S}.ndjson.gz"
+            with gzip.open(path, "wt", encoding="utf-8") as snapshot:
+                n = archive_cohort(cohort, chunk_size=options["chunk_size"], snapshot=snapshot)
+            self.stdout.write(self.style.SUCCESS(f"{cohort.name}: archived {n} enrollment(s), snapshot {path}."))
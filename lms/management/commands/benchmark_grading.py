@@ -0,0 +1,101 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lms import grading
+from lms.models import Assignment, Course, Grade, Module, Submission
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the grade engine on a synthetic course: compute() on prebuilt arrays, then "
+        "course_results() end to end on the same data seeded into the database (rolled back afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=10000)
+        parser.add_argument("--assignments", type=int, default=50)
+        parser.add_argument("--drop-lowest", type=int, default=2)
+        parser.add_argument("--late-penalty", type=float, default=10.0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--no-db", action="store_true", help="Only time compute(), skip seeding and course_results().")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        n_students, n_assignments = options["students"], options["assignments"]
+
+        columns = [(rng.choice([0.5, 1.0, 2.0]), rng.random() > 0.2) for _ in range(n_assignments)]
+        rows, cols, percents, late = [], [], [], []
+        for i in range(n_students):
+            for j in range(n_assignments):
+                if rng.random() < 0.9:
+                    rows.append(i)
+                    cols.append(j)
+                    percents.append(rng.uniform(0, 100))
+                    late.append(rng.random() < 0.1)
+        entries = (rows, cols, percents, late)
+        policy = grading.GradingPolicy(drop_lowest=options["drop_lowest"], late_penalty=options["late_penalty"])
+
+        self.stdout.write(f"{n_students} students x {n_assignments} assignments, {len(rows)} graded cells")
+        results = {}
+        engines = [("python", False)] + ([("numpy", True)] if grading.get_numpy() is not None else [])
+        for name, use_numpy in engines:
+            start = time.perf_counter()
+            results[name], _, _ = grading.compute(n_students, columns, entries, policy, use_numpy=use_numpy)
+            self.stdout.write(f"{name:>7}: {time.perf_counter() - start:.3f}s")
+
+        if len(results) == 2:
+            mismatches = sum(
+                1 for a, b in zip(results["python"], results["numpy"])
+                if (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-9)
+            )
+            self.stdout.write(f"engines disagree on {mismatches} student(s)")
+
+        if not options["no_db"]:
+            try:
+                with transaction.atomic():
+                    self.time_course_results(n_students, columns, entries, options)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def time_course_results(self, n_students, columns, entries, options):
+        start = time.perf_counter()
+        course = Course.objects.create(
+            title="benchmark", drop_lowest=options["drop_lowest"], late_penalty=options["late_penalty"]
+        )
+        module = Module.objects.create(course=course, title="benchmark")
+        assignments = Assignment.objects.bulk_create([
+            Assignment(module=module, title=f"A{j}", weight=w, allow_late=allow_late)
+            for j, (w, allow_late) in enumerate(columns)
+        ])
+        User = get_user_model()
+        users = User.objects.bulk_create([User(username=f"benchmark-{i}") for i in range(n_students)], batch_size=5000)
+        rows, cols, percents, late = entries
+        submissions = Submission.objects.bulk_create([
+            Submission(assignment=assignments[j], student=users[i], file_url="https://example.com/f",
+                       status="LATE" if is_late else "ON_TIME")
+            for i, j, is_late in zip(rows, cols, late)
+        ], batch_size=5000)
+        Grade.objects.bulk_create([
+            Grade(submission=s, score=p) for s, p in zip(submissions, percents)
+        ], batch_size=5000)
+        self.stdout.write(f"seeded {len(submissions)} submissions in {time.perf_counter() - start:.1f}s")
+
+        real_get_numpy = grading.get_numpy
+        engines = [("python", lambda: None)] + ([("numpy", real_get_numpy)] if real_get_numpy() is not None else [])
+        for name, get_numpy in engines:
+            grading.get_numpy = get_numpy
+            try:
+                start = time.perf_counter()
+                grading.course_results(course.id)
+                self.stdout.write(f"course_results {name:>7}: {time.perf_counter() - start:.3f}s")
+            finally:
+                grading.get_numpy = real_get_numpy
@@ -0,0 +1,74 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: what one gunicorn worker does before its first request.
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+watch = {m: m in sys.modules for m in ("google.oauth2", "google.auth.transport.requests", "numpy",
+                                       "django.contrib.sessions.backends.db", "django.contrib.messages.storage")}
+print(json.dumps({"seconds": elapsed, "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  "modules": len(sys.modules), "loaded": watch}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold start time, RSS and imports of a worker for one or more settings modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--settings-module", action="append", dest="modules",
+            help="Settings module to probe (repeatable). Defaults to backend.settings and backend.settings_api.",
+        )
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                            help="Also list the N slowest imports (python -X importtime).")
+
+    def probe(self, module, importtime=False):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": module}
+        cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+        proc = subprocess.run(cmd, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+        return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or ["backend.settings", "backend.settings_api"]
+
+        for module in modules:
+            samples = [self.probe(module)[0] for _ in range(options["runs"])]
+            seconds = statistics.median(s["seconds"] for s in samples)
+            rss_mb = statistics.median(s["maxrss_kb"] for s in samples) / 1024
+
+            self.stdout.write(self.style.MIGRATE_HEADING(module))
+            self.stdout.write(f"  startup  {seconds * 1000:.0f} ms (median of {len(samples)})")
+            self.stdout.write(f"  max RSS  {rss_mb:.1f} MB")
+            self.stdout.write(f"  modules  {samples[0]['modules']}")
+            for name, loaded in samples[0]["loaded"].items():
+                self.stdout.write(f"  {'loaded ' if loaded else 'lazy   '}  {name}")
+
+            if options["importtime"]:
+                _, stderr = self.probe(module, importtime=True)
+                self.stdout.write("  slowest imports (self us, cumulative us):")
+                for self_us, cumulative_us, name in self.slowest(stderr, options["importtime"]):
+                    self.stdout.write(f"    {self_us:>8} {cumulative_us:>9}  {name}")
+
+    @staticmethod
+    def slowest(stderr, n):
+        rows = []
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            parts = [p.strip() for p in line[len("import time:"):].split("|")]
+            if parts[0].isdigit():
+                rows.append((int(parts[0]), int(parts[1]), parts[2]))
+        return sorted(rows, reverse=True)[:n]
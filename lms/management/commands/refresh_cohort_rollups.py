@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from lms.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute cohort/course rollup rows flagged dirty (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild every cohort/course pair.")
+
+    def handle(self, *args, **options):
+        n = refresh_rollups(full=options["all"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {n} rollup row(s)."))
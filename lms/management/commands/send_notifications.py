@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from lms.notifications import deadline_digests, send, submission_digests
+
+
+class Command(BaseCommand):
+    help = "Email deadline digests to students and new-submission digests to lecturers (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="Look-ahead for due dates / look-back for submissions.")
+        parser.add_argument("--students-only", action="store_true")
+        parser.add_argument("--lecturers-only", action="store_true")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be sent without sending or logging.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        jobs = []
+        if not options["lecturers_only"]:
+            jobs.append(("deadline", deadline_digests))
+        if not options["students_only"]:
+            jobs.append(("new-submission", submission_digests))
+
+        for label, build in jobs:
+            kind, digests = build(now, options["hours"])
+            if options["dry_run"]:
+                self.stdout.write(f"{label}: would send {len(digests)} digest(s)")
+                continue
+            sent = send(kind, digests)
+            self.stdout.write(f"{label}: {len(digests)} digest(s) pending, sent {sent}")
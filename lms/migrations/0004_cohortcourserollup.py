@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0003_usertokenversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortCourseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('dropped_count', models.PositiveIntegerField(default=0)),
+                ('passed_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('dirty', models.BooleanField(db_index=True, default=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='lms.cohort')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cohort_rollups', to='lms.course')),
+            ],
+            options={
+                'unique_together': {('cohort', 'course')},
+            },
+        ),
+    ]
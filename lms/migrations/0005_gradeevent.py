@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 02:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0004_cohortcourserollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.PositiveSmallIntegerField(choices=[(1, 'Create'), (2, 'Update'), (3, 'Lock')])),
+                ('diff', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='grade_events', to=settings.AUTH_USER_MODEL)),
+                ('submission', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='grade_events', to='lms.submission')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['submission', 'created_at'], name='gradeevent_sub_time'), models.Index(fields=['actor', 'created_at'], name='gradeevent_actor_time')],
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:05
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    # external-content FTS5 index over lms_submissionsearch, rowid = submission_id
+    "CREATE VIRTUAL TABLE lms_submission_fts USING fts5(body, content='lms_submissionsearch', content_rowid='submission_id')",
+    """CREATE TRIGGER lms_submissionsearch_ai AFTER INSERT ON lms_submissionsearch BEGIN
+        INSERT INTO lms_submission_fts(rowid, body) VALUES (new.submission_id, new.body);
+    END""",
+    """CREATE TRIGGER lms_submissionsearch_ad AFTER DELETE ON lms_submissionsearch BEGIN
+        INSERT INTO lms_submission_fts(lms_submission_fts, rowid, body) VALUES ('delete', old.submission_id, old.body);
+    END""",
+    """CREATE TRIGGER lms_submissionsearch_au AFTER UPDATE ON lms_submissionsearch BEGIN
+        INSERT INTO lms_submission_fts(lms_submission_fts, rowid, body) VALUES ('delete', old.submission_id, old.body);
+        INSERT INTO lms_submission_fts(rowid, body) VALUES (new.submission_id, new.body);
+    END""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS lms_submissionsearch_au",
+    "DROP TRIGGER IF EXISTS lms_submissionsearch_ad",
+    "DROP TRIGGER IF EXISTS lms_submissionsearch_ai",
+    "DROP TABLE IF EXISTS lms_submission_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX lms_submissionsearch_body_gin ON lms_submissionsearch USING GIN (to_tsvector('simple', body))",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS lms_submissionsearch_body_gin",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_REVERSE)
+    elif vendor == "postgresql":
+        _run(schema_editor, POSTGRES_REVERSE)
+
+
+def backfill(apps, schema_editor):
+    # mirrors lms.search.rebuild_search_docs with historical models
+    Submission = apps.get_model("lms", "Submission")
+    SubmissionSearch = apps.get_model("lms", "SubmissionSearch")
+    word = re.compile(r"[^\W_]+")
+
+    rows = Submission.objects.values_list(
+        "id", "student__email", "student__username",
+        "assignment__title", "assignment__module__title", "grade__feedback",
+    ).iterator(chunk_size=2000)
+
+    batch = []
+    for row in rows:
+        text = " ".join(v or "" for v in row[1:]).lower()
+        batch.append(SubmissionSearch(submission_id=row[0], body=" ".join(word.findall(text))))
+        if len(batch) >= 2000:
+            SubmissionSearch.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SubmissionSearch.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0005_gradeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionSearch',
+            fields=[
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_doc', serialize=False, to='lms.submission')),
+                ('body', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0006_submissionsearch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='grade',
+            name='locked',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='status',
+            field=models.CharField(choices=[('ON_TIME', 'On Time'), ('LATE', 'Late'), ('MISSING', 'Missing')], db_index=True, default='ON_TIME', max_length=20),
+        ),
+    ]
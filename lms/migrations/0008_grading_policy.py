@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0007_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='weight',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='drop_lowest',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Ignore this many lowest assignment percents.'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='late_penalty',
+            field=models.FloatField(default=0.0, help_text='Percent deducted from late work where late is allowed.'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='pass_mark',
+            field=models.FloatField(default=70.0),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='weight',
+            field=models.FloatField(default=1.0),
+        ),
+    ]
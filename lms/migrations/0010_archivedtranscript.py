@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-19 06:10
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0009_notificationlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cohort',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedTranscript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_title', models.CharField(max_length=200)),
+                ('student_email', models.CharField(max_length=254)),
+                ('enrollment_status', models.CharField(max_length=20)),
+                ('enrolled_at', models.DateTimeField()),
+                ('average_percent', models.FloatField(blank=True, null=True)),
+                ('result', models.CharField(blank=True, max_length=8)),
+                ('submissions', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_transcripts', to='lms.cohort')),
+                ('course', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_transcripts', to='lms.course')),
+                ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_transcripts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'cohort'], name='transcript_course_cohort')],
+                'unique_together': {('cohort', 'course', 'student')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 07:30
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0010_archivedtranscript'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='weight',
+            field=models.FloatField(default=1.0, validators=[django.core.validators.MinValueValidator(0.0)]),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='late_penalty',
+            field=models.FloatField(default=0.0, help_text='Percent deducted from late work where late is allowed.', validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(100.0)]),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='pass_mark',
+            field=models.FloatField(default=70.0, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(100.0)]),
+        ),
+        migrations.AlterField(
+            model_name='module',
+            name='weight',
+            field=models.FloatField(default=1.0, validators=[django.core.validators.MinValueValidator(0.0)]),
+        ),
+    ]
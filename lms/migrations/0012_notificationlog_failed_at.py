@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0011_grading_policy_bounds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationlog',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
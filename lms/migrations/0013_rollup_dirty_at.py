@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0012_notificationlog_failed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cohortcourserollup',
+            name='dirty_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
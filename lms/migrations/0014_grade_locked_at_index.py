@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0013_rollup_dirty_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='grade',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -2,14 +2,22 @@ from django.db import models
 
 # Create your models here.
 
+from datetime import timedelta
+
 from django.conf import settings
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import F
+from django.dispatch import Signal
 from django.utils import timezone
 
 class Cohort(models.Model):
     name = models.CharField(max_length=120, unique=True)
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
+    # set by lms/archive.py when its live rows start moving to ArchivedTranscript
+    archived_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -39,6 +47,14 @@ class Course(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
 
+    # Grading policy, applied by lms/grading.py
+    pass_mark = models.FloatField(default=70.0, validators=[MinValueValidator(0.0), MaxValueValidator(100.0)])
+    drop_lowest = models.PositiveSmallIntegerField(default=0, help_text="Ignore this many lowest assignment percents.")
+    late_penalty = models.FloatField(
+        default=0.0, validators=[MinValueValidator(0.0), MaxValueValidator(100.0)],
+        help_text="Percent deducted from late work where late is allowed."
+    )
+
     def __str__(self):
         return self.title
 
@@ -63,6 +79,7 @@ class Module(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="modules")
     title = models.CharField(max_length=200)
     order = models.PositiveIntegerField(default=1)
+    weight = models.FloatField(default=1.0, validators=[MinValueValidator(0.0)])
 
     class Meta:
         ordering = ["order"]
@@ -72,9 +89,10 @@ class Assignment(models.Model):
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name="assignments")
     title = models.CharField(max_length=200)
     instructions = models.TextField(blank=True)
-    due_date = models.DateTimeField(null=True, blank=True)
+    due_date = models.DateTimeField(null=True, blank=True, db_index=True)
     max_score = models.PositiveIntegerField(default=100)
     allow_late = models.BooleanField(default=True)
+    weight = models.FloatField(default=1.0, validators=[MinValueValidator(0.0)])
 
 
 class Submission(models.Model):
@@ -87,20 +105,62 @@ class Submission(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="submissions")
     file_url = models.URLField()  # later you can switch to FileField + S3/R2
     submitted_at = models.DateTimeField(auto_now_add=True)
-    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ON_TIME)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ON_TIME, db_index=True)
 
     class Meta:
         unique_together = ("assignment", "student")
 
 
+# Sent by GradeQuerySet.lock() (bulk UPDATE, so no post_save) with
+# grades=[{"submission_id", "student_id", "assignment_id", "score", "feedback"}, ...]
+grades_locked = Signal()
+
+
+class GradeQuerySet(models.QuerySet):
+    def lock(self, by_user=None) -> int:
+        """
+        Lock every unlocked grade in the queryset with one conditional UPDATE,
+        then log a GradeEvent per grade it changed. Returns the number locked.
+        """
+        with transaction.atomic():
+            now = timezone.now()
+            # the stamp identifies this call's rows when reading them back
+            while Grade.objects.filter(locked_at=now).exists():
+                now += timedelta(microseconds=1)
+
+            if not self.filter(locked=False).update(locked=True, locked_at=now, locked_by=by_user):
+                return 0
+
+            rows = list(
+                Grade.objects
+                .filter(locked_at=now, locked_by=by_user)
+                .values("submission_id", "score", "feedback",
+                        student_id=F("submission__student_id"),
+                        assignment_id=F("submission__assignment_id"))
+            )
+            GradeEvent.objects.bulk_create([
+                GradeEvent(
+                    submission_id=r["submission_id"],
+                    actor_id=getattr(by_user, "pk", None),
+                    action=GradeEvent.Action.LOCK,
+                    diff={"locked": [False, True]},
+                    created_at=now,
+                )
+                for r in rows
+            ])
+            grades_locked.send(sender=Grade, grades=rows, by_user=by_user, locked_at=now)
+        return len(rows)
+
+
 class Grade(models.Model):
     submission = models.OneToOneField("Submission", on_delete=models.CASCADE, related_name="grade")
     score = models.FloatField()
     feedback = models.TextField(blank=True, default="")
 
     # ✅ NEW: Locking fields
-    locked = models.BooleanField(default=False)
-    locked_at = models.DateTimeField(null=True, blank=True)
+    locked = models.BooleanField(default=False, db_index=True)
+    # indexed: GradeQuerySet.lock() reads its rows back by this stamp
+    locked_at = models.DateTimeField(null=True, blank=True, db_index=True)
     locked_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         null=True,
@@ -112,8 +172,189 @@ class Grade(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def lock(self, by_user=None):
-        self.locked = True
-        self.locked_at = timezone.now()
-        self.locked_by = by_user
-        self.save(update_fields=["locked", "locked_at", "locked_by"])
+    objects = GradeQuerySet.as_manager()
+
+class GradeEventQuerySet(models.QuerySet):
+    """Refuses bulk update()/delete() so the log stays append-only."""
+
+    def update(self, **kwargs):
+        raise ValueError("GradeEvent is append-only.")
+
+    def delete(self):
+        raise ValueError("GradeEvent is append-only.")
+
+    update.queryset_only = True
+    delete.queryset_only = True
+
+
+class GradeEvent(models.Model):
+    """
+    Append-only history of grade changes, written in the same transaction as
+    the change itself. Kept narrow (small int action, JSON diff of changed
+    fields) since it grows with every edit; the composite indexes serve
+    "history of a submission" and "changes by lecturer X since <date>".
+    """
+    class Action(models.IntegerChoices):
+        CREATE = 1
+        UPDATE = 2
+        LOCK = 3
+
+    # no FK constraint: history outlives the submission row
+    submission = models.ForeignKey(
+        Submission, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name="grade_events"
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, db_index=False,
+        related_name="grade_events"
+    )
+    action = models.PositiveSmallIntegerField(choices=Action.choices)
+    diff = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["submission", "created_at"], name="gradeevent_sub_time"),
+            models.Index(fields=["actor", "created_at"], name="gradeevent_actor_time"),
+        ]
+
+    objects = GradeEventQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("GradeEvent is append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("GradeEvent is append-only.")
+
+    @classmethod
+    def record(cls, submission_id, actor, action, diff):
+        return cls.objects.create(
+            submission_id=submission_id,
+            actor_id=getattr(actor, "pk", None),
+            action=action,
+            diff=diff,
+        )
+
+
+def grade_diff(before: dict, after: dict) -> dict:
+    """{field: [old, new]} for the fields whose value changed."""
+    return {k: [before.get(k), v] for k, v in after.items() if before.get(k) != v}
+
+
+class SubmissionSearch(models.Model):
+    """
+    Denormalized search text per submission (student, assignment, module,
+    feedback), kept in sync by signals. Indexed with a GIN tsvector index on
+    PostgreSQL and mirrored into an FTS5 table on SQLite (see migration 0006).
+    """
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, primary_key=True, related_name="search_doc")
+    body = models.TextField(blank=True)
+
+
+class UserTokenVersion(models.Model):
+    """
+    Per-user JWT version. Tokens carry the version they were issued with;
+    bumping it revokes every outstanding token for that user.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="token_version")
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
+
+
+class CohortCourseRollup(models.Model):
+    """
+    Precomputed enrollment and pass/fail counts per cohort and course.
+    Rows are flagged dirty by signals and recomputed by
+    `manage.py refresh_cohort_rollups` (see lms/rollups.py).
+    """
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE, related_name="rollups")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="cohort_rollups")
+
+    active_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    dropped_count = models.PositiveIntegerField(default=0)
+    passed_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+
+    dirty = models.BooleanField(default=True, db_index=True)
+    # when it was last flagged; a refresh only clears flags set before it started
+    dirty_at = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("cohort", "course")
+
+    @property
+    def enrolled_count(self):
+        return self.active_count + self.completed_count + self.dropped_count
+
+
+class NotificationLog(models.Model):
+    """
+    One row per notified item, claimed before the email goes out so a digest
+    item is never sent twice (see lms/notifications.py).
+
+    DEADLINE: object_id is the assignment the student was reminded about.
+    NEW_SUBMISSIONS: object_id is the newest submission id in the lecturer's
+    digest, i.e. their watermark for the next run.
+
+    A claim whose send raised is kept with failed_at set: the message may
+    have gone out, so it is never retried automatically.
+    """
+    class Kind(models.IntegerChoices):
+        DEADLINE = 1
+        NEW_SUBMISSIONS = 2
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.PositiveSmallIntegerField(choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    batch = models.CharField(max_length=32)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("recipient", "kind", "object_id")
+
+
+class ArchivedTranscript(models.Model):
+    """
+    One student's enrollment, submissions and grades for a course in a
+    finished cohort, frozen into a single row by `manage.py archive_cohorts`
+    (see lms/archive.py) before the live rows are deleted. Read-only.
+    """
+    cohort = models.ForeignKey(Cohort, on_delete=models.PROTECT, related_name="archived_transcripts")
+    # no FK constraint: the archive outlives the course row
+    course = models.ForeignKey(
+        Course, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name="archived_transcripts"
+    )
+    course_title = models.CharField(max_length=200)
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL,
+        related_name="archived_transcripts"
+    )
+    student_email = models.CharField(max_length=254)
+
+    enrollment_status = models.CharField(max_length=20)
+    enrolled_at = models.DateTimeField()
+    average_percent = models.FloatField(null=True, blank=True)
+    result = models.CharField(max_length=8, blank=True)
+    # [{"submission_id", "assignment_id", "assignment_title", ..., "grade": {...} or None}, ...]
+    submissions = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("cohort", "course", "student")
+        indexes = [
+            models.Index(fields=["course", "cohort"], name="transcript_course_cohort"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("ArchivedTranscript is read-only.")
+        super().save(*args, **kwargs)
@@ -0,0 +1,198 @@
+"""
+Deadline and new-submission email digests, sent by
+`manage.py send_notifications` from cron.
+
+Every item is claimed in NotificationLog (unique per recipient/kind/object)
+before anything is sent. A digest only contains items this run claimed,
+so overlapping runs or a rerun after a crash never send an item twice.
+Digests go out one message at a time and each claim is marked sent right
+after its message. If a send raises, that claim is kept and marked failed
+(the message may have been delivered); only the claims never attempted are
+released for the next run.
+"""
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, F, Max, OuterRef, Q
+from django.utils import timezone
+
+from .models import Enrollment, NotificationLog, Submission
+
+User = get_user_model()
+
+
+class Digest:
+    def __init__(self, recipient_id, email, subject, lines, object_ids):
+        self.recipient_id = recipient_id
+        self.email = email
+        self.subject = subject
+        self.lines = lines
+        self.object_ids = object_ids
+
+    def message(self, connection):
+        return EmailMessage(
+            subject=self.subject,
+            body="\n".join(self.lines),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[self.email],
+            connection=connection,
+        )
+
+
+def due_soon_without_submission(now, hours):
+    """
+    (student_id, email, assignment_id, title, course title, due_date) for
+    every ACTIVE enrollment's assignment due within `hours` that has neither
+    a submission nor an earlier reminder. One query.
+    """
+    already_sent = NotificationLog.objects.filter(
+        recipient_id=OuterRef("student_id"),
+        kind=NotificationLog.Kind.DEADLINE,
+        object_id=OuterRef("assignment_id"),
+    )
+    submitted = Submission.objects.filter(
+        student_id=OuterRef("student_id"),
+        assignment_id=OuterRef("assignment_id"),
+    )
+    return (
+        Enrollment.objects
+        .filter(
+            status=Enrollment.Status.ACTIVE,
+            course__modules__assignments__due_date__gt=now,
+            course__modules__assignments__due_date__lte=now + timedelta(hours=hours),
+        )
+        .exclude(student__email="")
+        .annotate(
+            assignment_id=F("course__modules__assignments__id"),
+            assignment_title=F("course__modules__assignments__title"),
+            due_date=F("course__modules__assignments__due_date"),
+        )
+        .filter(~Exists(submitted), ~Exists(already_sent))
+        .order_by("student_id", "due_date")
+        .values_list("student_id", "student__email", "assignment_id", "assignment_title", "course__title", "due_date")
+    )
+
+
+def deadline_digests(now, hours):
+    by_student = defaultdict(dict)
+    emails = {}
+    for student_id, email, assignment_id, title, course_title, due in due_soon_without_submission(now, hours):
+        emails[student_id] = email
+        # same course through two cohorts -> same assignment twice
+        by_student[student_id][assignment_id] = (title, course_title, due)
+
+    digests = []
+    for student_id, items in by_student.items():
+        lines = [f"You have {len(items)} assignment(s) due in the next {hours} hours with no submission yet:", ""]
+        for title, course_title, due in items.values():
+            lines.append(f"- {course_title}: {title} (due {due:%Y-%m-%d %H:%M} UTC)")
+        digests.append(Digest(
+            student_id, emails[student_id],
+            f"{len(items)} assignment(s) due soon",
+            lines, list(items),
+        ))
+    return NotificationLog.Kind.DEADLINE, digests
+
+
+def submission_digests(now, hours):
+    """
+    For each staff member: submissions newer than their last digest (or the
+    last `hours` on their first one), grouped by course.
+    """
+    staff = dict(User.objects.filter(is_staff=True, is_active=True).exclude(email="").values_list("id", "email"))
+    if not staff:
+        return NotificationLog.Kind.NEW_SUBMISSIONS, []
+
+    marks = dict(
+        NotificationLog.objects
+        .filter(kind=NotificationLog.Kind.NEW_SUBMISSIONS, recipient_id__in=staff)
+        .values("recipient_id")
+        .annotate(last=Max("object_id"))
+        .values_list("recipient_id", "last")
+    )
+    since = now - timedelta(hours=hours)
+    # staff without a mark yet get the last `hours`; the others everything
+    # after their mark, however old
+    new = Q(submitted_at__gte=since) if len(marks) < len(staff) else Q()
+    if marks:
+        new |= Q(id__gt=min(marks.values()))
+    subs = Submission.objects.filter(new)
+    subs = list(
+        subs.order_by("id")
+        .values_list("id", "submitted_at", "assignment__title", "assignment__module__course__title", "student__email")
+    )
+
+    digests = []
+    for staff_id, email in staff.items():
+        mark = marks.get(staff_id)
+        mine = [s for s in subs if (s[0] > mark if mark is not None else s[1] >= since)]
+        if not mine:
+            continue
+        per_course = defaultdict(list)
+        for _, _, title, course_title, student_email in mine:
+            per_course[course_title].append(f"  - {title} ({student_email})")
+        lines = [f"{len(mine)} new submission(s):"]
+        for course_title, rows in per_course.items():
+            lines += ["", f"{course_title}:", *rows]
+        digests.append(Digest(staff_id, email, f"{len(mine)} new submission(s)", lines, [mine[-1][0]]))
+    return NotificationLog.Kind.NEW_SUBMISSIONS, digests
+
+
+def claim(kind, digests, batch):
+    """Insert log rows for every digest item; keep only the items this batch won."""
+    NotificationLog.objects.bulk_create(
+        [
+            NotificationLog(recipient_id=d.recipient_id, kind=kind, object_id=object_id, batch=batch)
+            for d in digests for object_id in d.object_ids
+        ],
+        ignore_conflicts=True,
+    )
+    won = set(NotificationLog.objects.filter(batch=batch).values_list("recipient_id", "object_id"))
+
+    mine, contested = [], []
+    for d in digests:
+        (mine if all((d.recipient_id, o) in won for o in d.object_ids) else contested).append(d)
+    if contested:
+        # another run got part of it: give our share back, next run redoes the rest
+        NotificationLog.objects.filter(batch=batch, recipient_id__in=[d.recipient_id for d in contested]).delete()
+    return mine
+
+
+def send(kind, digests, batch_size=None, dry_run=False):
+    """
+    Claim, then send one message at a time through one connection per batch,
+    marking each claim sent as soon as its message is. Returns the number sent.
+    """
+    if dry_run or not digests:
+        return 0
+
+    batch = uuid.uuid4().hex
+    digests = claim(kind, digests, batch)
+    batch_size = batch_size or getattr(settings, "NOTIFICATION_EMAIL_BATCH_SIZE", 100)
+    claims = NotificationLog.objects.filter(batch=batch)
+
+    sent = 0
+    try:
+        for start in range(0, len(digests), batch_size):
+            with get_connection() as connection:
+                for d in digests[start:start + batch_size]:
+                    try:
+                        delivered = connection.send_messages([d.message(connection)])
+                    except Exception:
+                        # may or may not have gone out: keep the claim
+                        claims.filter(recipient_id=d.recipient_id).update(failed_at=timezone.now())
+                        raise
+                    if not delivered:
+                        claims.filter(recipient_id=d.recipient_id).update(failed_at=timezone.now())
+                        continue
+                    claims.filter(recipient_id=d.recipient_id).update(sent_at=timezone.now())
+                    sent += 1
+    except Exception:
+        # release what was never attempted for the next run
+        claims.filter(sent_at__isnull=True, failed_at__isnull=True).delete()
+        raise
+    return sent
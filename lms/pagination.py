@@ -0,0 +1,55 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(submitted_at, pk) -> str:
+    raw = f"{submitted_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, pk = raw.rsplit("|", 1)
+        submitted_at = parse_datetime(ts)
+        if submitted_at is None:
+            raise ValueError(ts)
+        return submitted_at, int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CursorError("Invalid cursor.") from e
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return None
+    try:
+        limit = int(value)
+    except ValueError as e:
+        raise CursorError("limit must be an integer") from e
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def keyset_page(qs, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Newest-first page of a Submission queryset ordered by (-submitted_at, -id).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    qs = qs.order_by("-submitted_at", "-id")
+    if cursor:
+        submitted_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(submitted_at__lt=submitted_at) | Q(submitted_at=submitted_at, id__lt=pk))
+
+    rows = list(qs[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].submitted_at, rows[-1].id)
@@ -0,0 +1,104 @@
+"""
+Response cache for lecturer_submissions.
+
+Entries are keyed by (course, generation, assignment, page). Each course has
+a generation counter that Submission and Grade writes in that course bump
+after commit (see lms/signals.py), which orphans every cached page of that
+course at once and leaves other courses untouched. Orphans age out through
+the cache's LRU/TIMEOUT. Search requests (q=...) are not cached.
+
+Hits and misses are counted in the same cache. Both the generations and the
+counters have to be seen by every worker, so with a per-process (locmem)
+backend and more than one worker caching is off (LECTURER_CACHE_ENABLED in
+backend/settings.py) and every response is a BYPASS.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+
+lecturer_cache = ConnectionProxy(caches, "lecturer")
+
+HITS_KEY = "lecturer:stats:hits"
+MISSES_KEY = "lecturer:stats:misses"
+
+
+def cache_enabled() -> bool:
+    return getattr(settings, "LECTURER_CACHE_ENABLED", True)
+
+
+def generation_key(course_id):
+    return f"lecturer:gen:{course_id}"
+
+
+def get_generation(course_id):
+    key = generation_key(course_id)
+    gen = lecturer_cache.get(key)
+    if gen is None:
+        # start from the clock, not 0: an evicted counter must never come
+        # back to a value old entries were stored under
+        lecturer_cache.add(key, time.time_ns(), timeout=None)
+        gen = lecturer_cache.get(key)
+    return gen
+
+
+def bump_generation(course_id):
+    try:
+        lecturer_cache.incr(generation_key(course_id))
+    except ValueError:  # not cached: nothing stored under it can be served
+        pass
+
+
+def bump_on_commit(course_ids):
+    """Bump after commit, so a reader can't re-cache the old rows under the new generation."""
+    if not cache_enabled():
+        return
+    course_ids = {c for c in course_ids if c is not None}
+    if not course_ids:
+        return
+
+    def bump():
+        for course_id in course_ids:
+            bump_generation(course_id)
+
+    transaction.on_commit(bump)
+
+
+def submissions_key(course_id, assignment_id, cursor, limit):
+    gen = get_generation(course_id)
+    return f"lecturer:subs:{course_id}:{gen}:{assignment_id or ''}:{cursor or ''}:{limit or ''}"
+
+
+def _count(key):
+    try:
+        lecturer_cache.incr(key)
+    except ValueError:
+        lecturer_cache.add(key, 0, timeout=None)
+        lecturer_cache.incr(key)
+
+
+def get_cached(key):
+    payload = lecturer_cache.get(key)
+    _count(MISSES_KEY if payload is None else HITS_KEY)
+    return payload
+
+
+def set_cached(key, payload):
+    lecturer_cache.set(key, payload)
+
+
+def stats() -> dict:
+    if not cache_enabled():
+        return {"enabled": False, "hits": 0, "misses": 0, "hit_rate": None}
+    counts = lecturer_cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counts.get(HITS_KEY, 0)
+    misses = counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "enabled": True,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": (hits / total * 100.0) if total else None,
+    }
@@ -0,0 +1,121 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .grading import course_results
+from .models import CohortCourseRollup, Enrollment, Submission
+
+COUNT_FIELDS = ["active_count", "completed_count", "dropped_count", "passed_count", "failed_count"]
+
+STATUS_FIELDS = {
+    Enrollment.Status.ACTIVE: "active_count",
+    Enrollment.Status.COMPLETED: "completed_count",
+    Enrollment.Status.DROPPED: "dropped_count",
+}
+
+
+def mark_dirty(cohort_id, course_id):
+    """Upsert the (cohort, course) row as dirty in one statement."""
+    CohortCourseRollup.objects.bulk_create(
+        [CohortCourseRollup(cohort_id=cohort_id, course_id=course_id, dirty=True, dirty_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=["cohort", "course"],
+        update_fields=["dirty", "dirty_at"],
+    )
+
+
+def mark_rows_dirty(rollups) -> int:
+    """Flag every row in the `rollups` queryset for the next refresh."""
+    return rollups.update(dirty=True, dirty_at=timezone.now())
+
+
+def mark_submission_dirty(submission_id):
+    """A grade changed: every cohort's row for that submission's course is stale."""
+    course_ids = Submission.objects.filter(pk=submission_id).values("assignment__module__course_id")
+    mark_rows_dirty(CohortCourseRollup.objects.filter(course_id__in=course_ids))
+
+
+def compute_rollups(course_ids):
+    """
+    Return {(cohort_id, course_id): {field: count}} for the given courses:
+    one grouped query for the status counts, then a few queries per course
+    for the grade engine (lms/grading.py), never one per student.
+    """
+    rows = defaultdict(lambda: dict.fromkeys(COUNT_FIELDS, 0))
+    # archived cohorts keep the figures they had when archiving started
+    live = Enrollment.objects.filter(course_id__in=course_ids, cohort__archived_at__isnull=True)
+
+    status_counts = (
+        live
+        .values("cohort_id", "course_id", "status")
+        .annotate(n=Count("id"))
+    )
+    for r in status_counts:
+        field = STATUS_FIELDS.get(r["status"])
+        if field:
+            rows[(r["cohort_id"], r["course_id"])][field] = r["n"]
+
+    enrolled = defaultdict(list)
+    for cohort_id, course_id, student_id in (
+        live.values_list("cohort_id", "course_id", "student_id")
+    ):
+        enrolled[course_id].append((cohort_id, student_id))
+
+    for course_id, members in enrolled.items():
+        averages, policy = course_results(course_id)
+        for cohort_id, student_id in members:
+            result = policy.result(averages.get(student_id))
+            if result is None:
+                continue
+            rows[(cohort_id, course_id)]["passed_count" if result == "PASS" else "failed_count"] += 1
+
+    return rows
+
+
+def refresh_rollups(full=False) -> int:
+    """
+    Recompute dirty rollup rows (or every cohort/course pair when `full`).
+    Returns the number of rows written.
+
+    Flags are cleared in the same transaction as the upsert, and only where
+    they were set before this refresh started: a grade saved meanwhile keeps
+    its row dirty, and a refresh that fails leaves every flag in place.
+    """
+    started_at = timezone.now()
+    if full:
+        course_ids = set(Enrollment.objects.values_list("course_id", flat=True).distinct())
+    else:
+        course_ids = set(CohortCourseRollup.objects.filter(dirty=True).values_list("course_id", flat=True))
+    if not course_ids:
+        return 0
+
+    computed = compute_rollups(course_ids)
+    existing = (
+        CohortCourseRollup.objects
+        .filter(course_id__in=course_ids, cohort__archived_at__isnull=True)
+        .values_list("cohort_id", "course_id")
+    )
+    for key in existing:
+        computed.setdefault(key, dict.fromkeys(COUNT_FIELDS, 0))
+
+    now = timezone.now()
+    objs = [
+        CohortCourseRollup(cohort_id=cohort_id, course_id=course_id, dirty=False, refreshed_at=now, **counts)
+        for (cohort_id, course_id), counts in computed.items()
+    ]
+    with transaction.atomic():
+        CohortCourseRollup.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["cohort", "course"],
+            update_fields=[*COUNT_FIELDS, "refreshed_at"],
+        )
+        refreshed = CohortCourseRollup.objects.all() if full else CohortCourseRollup.objects.filter(course_id__in=course_ids)
+        (
+            refreshed
+            .filter(Q(dirty_at__isnull=True) | Q(dirty_at__lte=started_at), dirty=True)
+            .update(dirty=False)
+        )
+    return len(objs)
@@ -0,0 +1,71 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Submission, SubmissionSearch
+
+SEARCH_FIELDS = (
+    "student__email",
+    "student__username",
+    "assignment__title",
+    "assignment__module__title",
+    "grade__feedback",
+)
+
+FTS_TABLE = "lms_submission_fts"
+PG_CONFIG = "simple"  # names/emails/titles: no stemming or stop words
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and split on punctuation so `jane.doe@x.com` indexes as words."""
+    return " ".join(_WORD.findall((text or "").lower()))
+
+
+def rebuild_search_docs(**filters) -> int:
+    """
+    Rebuild SubmissionSearch rows for submissions matching `filters`
+    with one read and one upsert.
+    """
+    rows = Submission.objects.filter(**filters).values_list("id", *SEARCH_FIELDS)
+    docs = [
+        SubmissionSearch(submission_id=row[0], body=normalize(" ".join(v or "" for v in row[1:])))
+        for row in rows
+    ]
+    if docs:
+        SubmissionSearch.objects.bulk_create(
+            docs, update_conflicts=True, unique_fields=["submission"], update_fields=["body"],
+        )
+    return len(docs)
+
+
+def search_submissions(qs, query: str):
+    """
+    Restrict a Submission queryset to rows whose search text contains every
+    word of `query` as a prefix. Uses the GIN index on PostgreSQL, FTS5 on
+    SQLite and a plain LIKE scan anywhere else.
+    """
+    terms = _WORD.findall(query.lower())
+    if not terms:
+        return qs
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{t}:*" for t in terms)
+        return qs.filter(id__in=RawSQL(
+            f"SELECT submission_id FROM {SubmissionSearch._meta.db_table} "
+            f"WHERE to_tsvector('{PG_CONFIG}', body) @@ to_tsquery('{PG_CONFIG}', %s)",
+            [tsquery],
+        ))
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{t}"*' for t in terms)
+        return qs.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [match],
+        ))
+
+    for t in terms:
+        qs = qs.filter(search_doc__body__contains=t)
+    return qs
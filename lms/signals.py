@@ -0,0 +1,154 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import revoke_user_tokens
+from .events import get_broker, grade_event
+from .response_cache import bump_on_commit
+from .models import Assignment, CohortCourseRollup, Enrollment, Grade, Module, Submission, grades_locked
+from .rollups import mark_dirty, mark_rows_dirty, mark_submission_dirty
+from .search import rebuild_search_docs
+
+logger = logging.getLogger(__name__)
+
+
+def publish_events(events):
+    # runs after commit: a broker failure must not turn a saved grade into a 500
+    broker = get_broker()
+    for student_id, event in events:
+        try:
+            broker.publish(student_id, event)
+        except Exception:
+            logger.exception("Could not publish %s event for submission %s", event["type"], event["submission_id"])
+
+
+@receiver(post_save, sender=Grade)
+def publish_grade_event(sender, instance, **kwargs):
+    # locking is a bulk UPDATE (GradeQuerySet.lock), see publish_bulk_lock_events
+    student_id = instance.submission.student_id
+    event = grade_event(instance, "grade")
+
+    # only tell the student once the change is actually visible
+    transaction.on_commit(lambda: publish_events([(student_id, event)]))
+
+
+@receiver(grades_locked)
+def publish_bulk_lock_events(sender, grades, locked_at, **kwargs):
+    events = [
+        (g["student_id"], {
+            "type": "lock",
+            "submission_id": g["submission_id"],
+            "assignment_id": g["assignment_id"],
+            "score": g["score"],
+            "feedback": g["feedback"],
+            "locked": True,
+            "locked_at": locked_at,
+        })
+        for g in grades
+    ]
+
+    transaction.on_commit(lambda: publish_events(events))
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_rollup_dirty(sender, instance, **kwargs):
+    mark_dirty(instance.cohort_id, instance.course_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted_rollup_dirty(sender, instance, **kwargs):
+    # no upsert here: the course itself may be mid-cascade delete
+    mark_rows_dirty(CohortCourseRollup.objects.filter(cohort_id=instance.cohort_id, course_id=instance.course_id))
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def grade_rollup_dirty(sender, instance, **kwargs):
+    mark_submission_dirty(instance.submission_id)
+
+
+# --- search index sync (lms/search.py) ---
+
+@receiver(post_save, sender=Submission)
+def submission_search_sync(sender, instance, **kwargs):
+    rebuild_search_docs(pk=instance.pk)
+
+
+@receiver(post_save, sender=Grade)
+def grade_search_sync(sender, instance, update_fields=None, **kwargs):
+    # partial saves that leave feedback alone don't change the document
+    if update_fields and "feedback" not in update_fields:
+        return
+    rebuild_search_docs(pk=instance.submission_id)
+
+
+@receiver(post_delete, sender=Grade)
+def grade_deleted_search_sync(sender, instance, **kwargs):
+    # after commit: if the submission is being deleted too there is nothing to rebuild
+    submission_id = instance.submission_id
+    transaction.on_commit(lambda: rebuild_search_docs(pk=submission_id))
+
+
+@receiver(post_save, sender=Assignment)
+def assignment_search_sync(sender, instance, created, **kwargs):
+    if not created:
+        rebuild_search_docs(assignment_id=instance.pk)
+
+
+@receiver(post_save, sender=Module)
+def module_search_sync(sender, instance, created, **kwargs):
+    if not created:
+        rebuild_search_docs(assignment__module_id=instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_search_sync(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and not {"email", "username"} & set(update_fields)):
+        return
+    rebuild_search_docs(student_id=instance.pk)
+
+
+# --- token revocation (lms/authentication.py) ---
+# Tokens carry is_staff and are trusted without a User lookup, so a change to
+# either access flag must revoke the tokens already issued.
+
+ACCESS_FIELDS = ("is_active", "is_staff")
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_access_flags(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or instance.pk is None or (update_fields and not set(ACCESS_FIELDS) & set(update_fields)):
+        return
+    instance._access_before = (
+        sender._default_manager.filter(pk=instance.pk).values_list(*ACCESS_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_access_change(sender, instance, created, **kwargs):
+    before = instance.__dict__.pop("_access_before", None)
+    if created or before is None:
+        return
+    if before != tuple(getattr(instance, f) for f in ACCESS_FIELDS):
+        # after commit, so no request can re-cache the old version meanwhile
+        transaction.on_commit(lambda: revoke_user_tokens(instance))
+
+
+# --- lecturer_submissions cache (lms/response_cache.py) ---
+
+@receiver([post_save, post_delete], sender=Submission)
+def submission_cache_bump(sender, instance, **kwargs):
+    bump_on_commit(Assignment.objects.filter(pk=instance.assignment_id).values_list("module__course_id", flat=True))
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def grade_cache_bump(sender, instance, **kwargs):
+    bump_on_commit(Submission.objects.filter(pk=instance.submission_id).values_list("assignment__module__course_id", flat=True))
+
+
+@receiver(grades_locked)
+def grades_locked_cache_bump(sender, grades, **kwargs):
+    assignment_ids = {g["assignment_id"] for g in grades}
+    bump_on_commit(Assignment.objects.filter(pk__in=assignment_ids).values_list("module__course_id", flat=True).distinct())
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .authentication import TOKEN_VERSION_CLAIM, ClaimsJWTAuthentication, get_token_version, stored_token_version
+from .events import get_broker
+
+HEARTBEAT_SECONDS = 15
+STREAM_TICKET_SALT = "lms.stream-ticket"
+
+
+def issue_stream_ticket(user) -> str:
+    """
+    A signed ticket that only opens me/events/ for `user` and expires after
+    STREAM_TICKET_SECONDS. EventSource can't send headers, so the browser
+    puts this in the URL instead of its access token, which would otherwise
+    end up in proxy and server access logs.
+    """
+    return signing.dumps({"uid": user.pk, "ver": stored_token_version(user.pk)}, salt=STREAM_TICKET_SALT)
+
+
+def authenticate_stream(request):
+    """
+    (user_id, token version) from ?ticket=<stream ticket> or an
+    Authorization: Bearer header, or None.
+    """
+    ticket = request.GET.get("ticket")
+    if ticket:
+        try:
+            data = signing.loads(
+                ticket, salt=STREAM_TICKET_SALT, max_age=getattr(settings, "STREAM_TICKET_SECONDS", 30)
+            )
+        except signing.BadSignature:  # includes SignatureExpired
+            return None
+        # same revocation rule as the access token it was issued for
+        if data["ver"] != get_token_version(data["uid"]):
+            return None
+        return data["uid"], data["ver"]
+
+    auth = ClaimsJWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header else None
+    if not raw:
+        return None
+
+    try:
+        token = auth.get_validated_token(raw)
+        return auth.get_user(token).pk, token.get(TOKEN_VERSION_CLAIM, 0)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def still_valid(user_id, version) -> bool:
+    return get_token_version(user_id) == version
+
+
+@require_GET
+async def my_grade_events(request):
+    """
+    Server-sent events for the authenticated student: `grade` when a grade is
+    saved, `lock` when it is finalized. Browsers authenticate with
+    ?ticket= from me/events/ticket/; the ticket only has to be valid when the
+    stream opens, so fetch a fresh one before reconnecting. The stream ends
+    once the user's tokens are revoked (checked every HEARTBEAT_SECONDS).
+
+    Needs an ASGI server (backend.asgi). Under WSGI (the gunicorn deployment)
+    Django would buffer the endless stream and pin a sync worker until its
+    timeout, so the view answers 503 instead; EventSource does not retry on
+    a non-200 response.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Live events are not available on this server."}, status=503)
+
+    auth = await sync_to_async(authenticate_stream)(request)
+    if auth is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    user_id, version = auth
+
+    broker = get_broker()
+    queue = broker.subscribe(user_id)
+
+    async def stream():
+        loop = asyncio.get_running_loop()
+        checked = loop.time()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    event = None
+                # tokens revoked since the stream opened end it (the client
+                # then needs a new ticket, which a revoked user can't get)
+                if loop.time() - checked >= HEARTBEAT_SECONDS:
+                    if not await sync_to_async(still_valid)(user_id, version):
+                        return
+                    checked = loop.time()
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            broker.unsubscribe(user_id, queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
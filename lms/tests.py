@@ -1,3 +1,590 @@
-from django.test import TestCase
+import random
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from .authentication import ClaimsJWTAuthentication, _token_version_key, revoke_user_tokens
+from .grading import GradingPolicy, compute, course_results, get_numpy, submission_percent
+from .models import (
+    ArchivedTranscript, Assignment, Cohort, Course, Enrollment, Grade, GradeEvent, Module, Submission, SubmissionSearch,
+)
+from .throttling import SubmitAssignmentThrottle
+from .views import issue_jwt_for_user
+
+BOTH_PATHS = (False, True) if get_numpy() is not None else (False,)
+
+
+def averages(n_students, columns, cells, policy, use_numpy):
+    """compute() from {(row, col): (percent, late)}."""
+    rows, cols, percents, late = [], [], [], []
+    for (i, j), (p, is_late) in cells.items():
+        rows.append(i)
+        cols.append(j)
+        percents.append(p)
+        late.append(is_late)
+    return compute(n_students, columns, (rows, cols, percents, late), policy, detail=True, use_numpy=use_numpy)
+
+
+class ComputeTests(SimpleTestCase):
+    def assertAverage(self, columns, cells, policy, expected):
+        for use_numpy in BOTH_PATHS:
+            with self.subTest(use_numpy=use_numpy):
+                avg, _, _ = averages(1, columns, {(0, j): c for j, c in cells.items()}, policy, use_numpy)
+                if expected is None:
+                    self.assertIsNone(avg[0])
+                else:
+                    self.assertAlmostEqual(avg[0], expected)
+
+    def test_weights(self):
+        columns = [(1.0, True), (3.0, True)]
+        self.assertAverage(columns, {0: (40.0, False), 1: (80.0, False)}, GradingPolicy(), 70.0)
+
+    def test_zero_weight_column_is_ignored(self):
+        columns = [(0.0, True), (1.0, True)]
+        self.assertAverage(columns, {0: (0.0, False), 1: (90.0, False)}, GradingPolicy(), 90.0)
+
+    def test_no_counted_work(self):
+        self.assertAverage([(1.0, True)], {}, GradingPolicy(), None)
+
+    def test_drop_lowest(self):
+        columns = [(1.0, True)] * 3
+        cells = {0: (50.0, False), 1: (90.0, False), 2: (70.0, False)}
+        self.assertAverage(columns, cells, GradingPolicy(drop_lowest=1), 80.0)
+
+    def test_drop_lowest_keeps_at_least_one(self):
+        columns = [(1.0, True)] * 2
+        cells = {0: (50.0, False), 1: (90.0, False)}
+        self.assertAverage(columns, cells, GradingPolicy(drop_lowest=5), 90.0)
+
+    def test_drop_lowest_tie_drops_first_column(self):
+        # same percent, different weights: the tie-break decides the average
+        columns = [(1.0, True), (3.0, True), (1.0, True)]
+        cells = {0: (60.0, False), 1: (60.0, False), 2: (100.0, False)}
+        # column 0 is dropped, not column 1: (60*3 + 100) / 4
+        self.assertAverage(columns, cells, GradingPolicy(drop_lowest=1), 70.0)
+        for use_numpy in BOTH_PATHS:
+            with self.subTest(use_numpy=use_numpy):
+                _, _, dropped = averages(1, columns, {(0, j): c for j, c in cells.items()}, GradingPolicy(drop_lowest=1), use_numpy)
+                self.assertEqual(dropped[0], {0})
+
+    def test_late_penalty(self):
+        columns = [(1.0, True), (1.0, True)]
+        cells = {0: (80.0, True), 1: (80.0, False)}
+        self.assertAverage(columns, cells, GradingPolicy(late_penalty=25), 70.0)
+
+    def test_late_not_allowed_scores_zero(self):
+        columns = [(1.0, False), (1.0, True)]
+        cells = {0: (80.0, True), 1: (80.0, False)}
+        self.assertAverage(columns, cells, GradingPolicy(), 40.0)
+        self.assertAverage(columns, cells, GradingPolicy(late_penalty=50), 40.0)
+
+    def test_on_time_work_ignores_late_rules(self):
+        columns = [(1.0, False)]
+        self.assertAverage(columns, {0: (80.0, False)}, GradingPolicy(late_penalty=50), 80.0)
+
+    def test_late_penalty_is_clamped(self):
+        self.assertEqual(GradingPolicy(late_penalty=150).late_penalty, 100.0)
+        self.assertEqual(GradingPolicy(late_penalty=-5).late_penalty, 0.0)
+
+    def test_result(self):
+        policy = GradingPolicy(pass_mark=60)
+        self.assertEqual(policy.result(60.0), "PASS")
+        self.assertEqual(policy.result(59.9), "F")
+        self.assertIsNone(policy.result(None))
+
+
+class SubmissionPercentTests(SimpleTestCase):
+    def test_graded(self):
+        self.assertAlmostEqual(submission_percent(15, 20, "ON_TIME"), 75.0)
+
+    def test_missing_counts_as_zero(self):
+        self.assertEqual(submission_percent(None, 100, "MISSING"), 0.0)
+
+    def test_ungraded_does_not_count(self):
+        self.assertIsNone(submission_percent(None, 100, "ON_TIME"))
+        self.assertIsNone(submission_percent(None, 100, "LATE"))
+
+    def test_zero_max_score(self):
+        self.assertIsNone(submission_percent(5, 0, "ON_TIME"))
+
+
+@skipUnless(get_numpy() is not None, "numpy is not installed")
+class NumpyParityTests(SimpleTestCase):
+    def test_random_cases(self):
+        rng = random.Random(20261019)
+        for case in range(2000):
+            n_students = rng.randint(1, 6)
+            n_cols = rng.randint(0, 6)
+            columns = [(rng.choice([0.0, 0.5, 1.0, 2.0, 3.0]), rng.random() < 0.7) for _ in range(n_cols)]
+            policy = GradingPolicy(
+                pass_mark=70,
+                drop_lowest=rng.choice([0, 0, 1, 2, 10]),
+                late_penalty=rng.choice([0, 10, 33.3, 100]),
+            )
+            cells = {}
+            for i in range(n_students):
+                for j in range(n_cols):
+                    if rng.random() < 0.7:
+                        # coarse percents so drop-lowest ties are common
+                        cells[i, j] = (float(rng.choice([0, 25, 50, 50, 75, 100, rng.uniform(0, 100)])), rng.random() < 0.3)
+
+            py = averages(n_students, columns, cells, policy, use_numpy=False)
+            np_ = averages(n_students, columns, cells, policy, use_numpy=True)
+            with self.subTest(case=case):
+                for a, b in zip(py[0], np_[0]):
+                    if a is None or b is None:
+                        self.assertEqual(a, b)
+                    else:
+                        self.assertAlmostEqual(a, b, places=9)
+                self.assertEqual(py[2], np_[2])
+                self.assertEqual(len(py[1]), len(np_[1]))
+                for a, b in zip(py[1], np_[1]):
+                    self.assertEqual(a.keys(), b.keys())
+                    for j in a:
+                        self.assertAlmostEqual(a[j], b[j], places=9)
+
+
+class CourseResultsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.course = Course.objects.create(title="Networking", late_penalty=10, drop_lowest=0)
+        module = Module.objects.create(course=cls.course, title="M1", weight=2.0)
+        cls.a1 = Assignment.objects.create(module=module, title="A1", max_score=50)
+        cls.a2 = Assignment.objects.create(module=module, title="A2", max_score=100, weight=3.0)
+        cls.a3 = Assignment.objects.create(module=module, title="A3", allow_late=False)
+        cls.alice = User.objects.create(username="alice", email="alice@example.com")
+        cls.bob = User.objects.create(username="bob", email="bob@example.com")
+
+        def submit(assignment, student, status, score=None):
+            s = Submission.objects.create(assignment=assignment, student=student, file_url="https://example.com/f", status=status)
+            if score is not None:
+                Grade.objects.create(submission=s, score=score)
+
+        # alice: 80% on time (w2), 90% late -> 81% (w6), late on a no-late assignment -> 0 (w2)
+        submit(cls.a1, cls.alice, "ON_TIME", 40)
+        submit(cls.a2, cls.alice, "LATE", 90)
+        submit(cls.a3, cls.alice, "LATE", 100)
+        # bob: one missing (counts as 0), one ungraded (not counted)
+        submit(cls.a1, cls.bob, "MISSING")
+        submit(cls.a2, cls.bob, "ON_TIME", 60)
+        submit(cls.a3, cls.bob, "ON_TIME")
+
+    def test_course_results(self):
+        for use_numpy in BOTH_PATHS:
+            with self.subTest(use_numpy=use_numpy):
+                with mock.patch("lms.grading.get_numpy", return_value=get_numpy() if use_numpy else None):
+                    results, policy = course_results(self.course.id)
+                self.assertAlmostEqual(results[self.alice.id], (80 * 2 + 81 * 6 + 0 * 2) / 10)
+                self.assertAlmostEqual(results[self.bob.id], (0 * 2 + 60 * 6) / 8)
+                self.assertEqual(policy.result(results[self.bob.id]), "F")
+
+    def test_student_ids(self):
+        results, _ = course_results(self.course.id, student_ids=[self.bob.id])
+        self.assertEqual(set(results), {self.bob.id})
+
+
+def api_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_jwt_for_user(user)['access']}")
+    return client
+
+
+class TokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(username="carol", email="carol@example.com", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_claims_user_needs_no_query(self):
+        token = issue_jwt_for_user(self.user)["access"]
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        with self.assertNumQueries(0):
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, "carol@example.com")
+        self.assertTrue(user.is_staff)
+
+    def test_revoked_token(self):
+        client = api_client(self.user)
+        self.assertEqual(client.get("/api/me/courses/").status_code, 200)
+        revoke_user_tokens(self.user)
+        self.assertEqual(client.get("/api/me/courses/").status_code, 401)
+        self.assertEqual(api_client(self.user).get("/api/me/courses/").status_code, 200)
+
+    def test_demoted_user(self):
+        client = api_client(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = False
+            self.user.save()
+        self.assertEqual(client.get("/api/me/courses/").status_code, 401)
+
+    def test_token_issued_after_revoke_on_another_worker(self):
+        revoke_user_tokens(self.user)
+        client = api_client(self.user)
+        # this worker still has the version from before the revoke cached
+        cache.set(_token_version_key(self.user.pk), 0)
+        self.assertEqual(client.get("/api/me/courses/").status_code, 200)
+
+
+class SubmitThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(title="Routing")
+        cls.assignment = Assignment.objects.create(module=Module.objects.create(course=course, title="M1"), title="A1")
+        cls.student = get_user_model().objects.create(username="dave", email="dave@example.com")
+        Enrollment.objects.create(student=cls.student, course=course, cohort=Cohort.objects.create(name="2026A"))
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.client = api_client(self.student)
+        self.url = f"/api/assignments/{self.assignment.id}/submit/"
+
+    def submit(self):
+        return self.client.post(self.url, {"file_url": "https://example.com/f"}, format="json").status_code
+
+    def test_limit_and_refill(self):
+        clock = mock.Mock(return_value=1_000_000.0)
+        with mock.patch.object(SubmitAssignmentThrottle, "timer", clock):
+            # 20/min: the first goes through, the rest are duplicates
+            self.assertEqual([self.submit() for _ in range(20)], [201] + [409] * 19)
+            self.assertEqual(self.submit(), 429)
+
+            # one token back every 3 s
+            clock.return_value += 3
+            self.assertEqual(self.submit(), 409)
+            self.assertEqual(self.submit(), 429)
+
+            # idle for a minute: the bucket is full again
+            clock.return_value += 60
+            self.assertEqual([self.submit() for _ in range(21)], [409] * 20 + [429])
+
+
+class LecturerSubmissionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.course = Course.objects.create(title="Security")
+        module = Module.objects.create(course=cls.course, title="Firewalls")
+        cls.acl = Assignment.objects.create(module=module, title="Access lists")
+        cls.nat = Assignment.objects.create(module=module, title="NAT lab")
+        cls.staff = User.objects.create(username="erin", email="erin@example.com", is_staff=True)
+        cls.jane = User.objects.create(username="jane", email="jane.doe@example.com")
+        cls.others = [User.objects.create(username=f"s{i}", email=f"s{i}@example.com") for i in range(6)]
+        for student in [cls.jane] + cls.others:
+            Submission.objects.create(assignment=cls.acl, student=student, file_url="https://example.com/f")
+        Submission.objects.create(assignment=cls.nat, student=cls.others[0], file_url="https://example.com/f")
+        # same timestamp everywhere: the cursor has to break ties on id
+        Submission.objects.update(submitted_at=timezone.now())
+
+    def setUp(self):
+        self.client = api_client(self.staff)
+
+    def get(self, **params):
+        return self.client.get("/api/lecturer/submissions/", {"course_id": self.course.id, **params})
+
+    def ids(self, response):
+        return [s["submission_id"] for s in response.data["submissions"]]
+
+    def test_search_student(self):
+        jane = Submission.objects.get(student=self.jane)
+        self.assertEqual(self.ids(self.get(q="jane")), [jane.id])
+        self.assertEqual(self.ids(self.get(q="Jane.D")), [jane.id])
+
+    def test_search_assignment_title(self):
+        nat = Submission.objects.get(assignment=self.nat)
+        self.assertEqual(self.ids(self.get(q="nat lab")), [nat.id])
+        self.assertEqual(len(self.ids(self.get(q="access"))), 7)
+        self.assertEqual(self.ids(self.get(q="nosuchword")), [])
+
+    def test_search_follows_renames(self):
+        self.nat.title = "Port forwarding"
+        self.nat.save()
+        nat = Submission.objects.get(assignment=self.nat)
+        self.assertEqual(self.ids(self.get(q="forwarding")), [nat.id])
+        self.assertEqual(self.ids(self.get(q="nat")), [])
+
+    def test_cursor_pages(self):
+        expected = self.ids(self.get())
+        self.assertEqual(len(expected), 8)
+
+        seen, cursor = [], None
+        while True:
+            response = self.get(limit=3, **({"cursor": cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            seen += self.ids(response)
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_cursor_is_stable_under_inserts(self):
+        first = self.get(limit=3)
+        student = get_user_model().objects.create(username="late", email="late@example.com")
+        late = Submission.objects.create(assignment=self.nat, student=student, file_url="https://example.com/f")
+        rest = self.get(limit=10, cursor=first.data["next_cursor"])
+        pages = self.ids(first) + self.ids(rest)
+        # the new row sorts before the first page and shows up on neither
+        self.assertNotIn(late.id, pages)
+        self.assertEqual(len(pages), len(set(pages)))
+        self.assertEqual(len(pages), 8)
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.get(limit=3, cursor="nonsense").status_code, 400)
+
+
+class SendNotificationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        course = Course.objects.create(title="Wireless")
+        module = Module.objects.create(course=course, title="M1")
+        cls.assignment = Assignment.objects.create(module=module, title="Site survey", due_date=timezone.now() + timedelta(hours=6))
+        cohort = Cohort.objects.create(name="2026B")
+        cls.students = [User.objects.create(username=f"w{i}", email=f"w{i}@example.com") for i in range(3)]
+        for student in cls.students:
+            Enrollment.objects.create(student=student, course=course, cohort=cohort)
+        User.objects.create(username="frank", email="frank@example.com", is_staff=True)
+        Submission.objects.create(assignment=cls.assignment, student=cls.students[0], file_url="https://example.com/f")
+
+    def run_command(self):
+        call_command("send_notifications", stdout=StringIO())
+
+    def recipients(self):
+        return sorted(m.to[0] for m in mail.outbox)
+
+    def test_rerun_sends_nothing_twice(self):
+        self.run_command()
+        self.assertEqual(self.recipients(), ["frank@example.com", "w1@example.com", "w2@example.com"])
+
+        self.run_command()
+        self.assertEqual(len(mail.outbox), 3)
+
+        # only the new submission goes into the next lecturer digest
+        Submission.objects.create(assignment=self.assignment, student=self.students[1], file_url="https://example.com/f")
+        self.run_command()
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(mail.outbox[-1].to, ["frank@example.com"])
+        self.assertIn("1 new submission(s)", mail.outbox[-1].subject)
+        self.assertIn("w1@example.com", mail.outbox[-1].body)
+
+    def test_failed_send_is_not_retried(self):
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def flaky(backend, messages):
+            calls.append(messages[0].to[0])
+            if len(calls) == 1:
+                raise OSError("connection reset")
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", flaky):
+            with self.assertRaises(OSError):
+                self.run_command()
+        self.assertEqual(mail.outbox, [])
+
+        # the failed digest may have gone out, the unattempted one is sent now
+        self.run_command()
+        students = [m.to[0] for m in mail.outbox if m.to[0] != "frank@example.com"]
+        self.assertEqual(len(students), 1)
+        self.assertNotEqual(students[0], calls[0])
+
+
+class FinalizeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.course = Course.objects.create(title="Switching")
+        module = Module.objects.create(course=cls.course, title="VLANs")
+        cls.a1 = Assignment.objects.create(module=module, title="Trunks")
+        cls.a2 = Assignment.objects.create(module=module, title="STP")
+        cls.staff = User.objects.create(username="grace", email="grace@example.com", is_staff=True)
+        cls.subs = []
+        for i, assignment in enumerate([cls.a1, cls.a1, cls.a2]):
+            student = User.objects.create(username=f"v{i}", email=f"v{i}@example.com")
+            sub = Submission.objects.create(assignment=assignment, student=student, file_url="https://example.com/f")
+            Grade.objects.create(submission=sub, score=50 + i)
+            cls.subs.append(sub)
+
+    def setUp(self):
+        self.client = api_client(self.staff)
+
+    def post(self, url, data=None):
+        return self.client.post(url, data or {}, format="json")
+
+    def regrade(self, submission, score=99):
+        return self.post(f"/api/lecturer/submissions/{submission.id}/grade/", {"score": score})
+
+    def test_finalize_assignment(self):
+        response = self.post(f"/api/lecturer/assignments/{self.a1.id}/finalize/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["locked"], 2)
+        locked = Grade.objects.filter(locked=True)
+        self.assertEqual({g.submission_id for g in locked}, {self.subs[0].id, self.subs[1].id})
+        self.assertEqual({g.locked_by_id for g in locked}, {self.staff.id})
+        self.assertEqual(GradeEvent.objects.filter(action=GradeEvent.Action.LOCK).count(), 2)
+
+        self.assertEqual(self.regrade(self.subs[0]).status_code, 409)
+        self.assertEqual(Grade.objects.get(submission=self.subs[0]).score, 50)
+        self.assertEqual(self.regrade(self.subs[2]).status_code, 200)
+
+        # already locked grades are left alone
+        response = self.post(f"/api/lecturer/assignments/{self.a1.id}/finalize/")
+        self.assertEqual(response.data["locked"], 0)
+        self.assertEqual(GradeEvent.objects.filter(action=GradeEvent.Action.LOCK).count(), 2)
+
+    def test_finalize_course(self):
+        response = self.post(f"/api/lecturer/courses/{self.course.id}/finalize/")
+        self.assertEqual(response.data["locked"], 3)
+        for sub in self.subs:
+            self.assertEqual(self.regrade(sub).status_code, 409)
+
+    def test_ungraded_blocks_unless_forced(self):
+        student = get_user_model().objects.create(username="ungraded", email="ungraded@example.com")
+        pending = Submission.objects.create(assignment=self.a2, student=student, file_url="https://example.com/f")
+        url = f"/api/lecturer/courses/{self.course.id}/finalize/"
+
+        response = self.post(url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([b["submission_id"] for b in response.data["blocking"]], [pending.id])
+        self.assertFalse(Grade.objects.filter(locked=True).exists())
+
+        response = self.post(url, {"force": True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["locked"], 3)
+        self.assertEqual(self.regrade(pending).status_code, 200)
+
+    def test_lock_one_grade(self):
+        url = f"/api/lecturer/submissions/{self.subs[0].id}/lock/"
+        self.assertEqual(self.post(url).data["detail"], "Grade locked (FINAL) ✅")
+        self.assertEqual(self.post(url).data["detail"], "Already locked.")
+        self.assertEqual(self.regrade(self.subs[0]).status_code, 409)
+        self.assertEqual(Grade.objects.filter(locked=True).count(), 1)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        today = timezone.now().date()
+        cls.course = Course.objects.create(title="Routing basics", pass_mark=50)
+        module = Module.objects.create(course=cls.course, title="Static routes")
+        cls.assignment = Assignment.objects.create(module=module, title="Default route")
+        cls.old = Cohort.objects.create(name="2023A", end_date=today - timedelta(days=800))
+        cls.recent = Cohort.objects.create(name="2026A", end_date=today - timedelta(days=1))
+        cls.staff = User.objects.create(username="heidi", email="heidi@example.com", is_staff=True)
+        cls.alumnus = User.objects.create(username="ivan", email="ivan@example.com")
+        cls.current = User.objects.create(username="judy", email="judy@example.com")
+        for cohort, student, score in ((cls.old, cls.alumnus, 80), (cls.recent, cls.current, 30)):
+            Enrollment.objects.create(student=student, course=cls.course, cohort=cohort)
+            sub = Submission.objects.create(assignment=cls.assignment, student=student, file_url="https://example.com/f")
+            Grade.objects.create(submission=sub, score=score)
+            GradeEvent.record(sub.id, cls.staff, GradeEvent.Action.CREATE, {"score": [None, score]})
+
+    def test_archive_cohorts(self):
+        sub_id = Submission.objects.get(student=self.alumnus).id
+        call_command("archive_cohorts", stdout=StringIO())
+
+        transcript = ArchivedTranscript.objects.get()
+        self.assertEqual((transcript.cohort_id, transcript.course_id, transcript.student_id), (self.old.id, self.course.id, self.alumnus.id))
+        self.assertEqual(transcript.course_title, "Routing basics")
+        self.assertAlmostEqual(transcript.average_percent, 80.0)
+        self.assertEqual(transcript.result, "PASS")
+        self.assertEqual([s["submission_id"] for s in transcript.submissions], [sub_id])
+        self.assertEqual(transcript.submissions[0]["grade"]["score"], 80)
+
+        # live rows of the old cohort are gone, the recent cohort is untouched
+        self.assertFalse(Enrollment.objects.filter(cohort=self.old).exists())
+        self.assertFalse(Submission.objects.filter(pk=sub_id).exists())
+        self.assertFalse(Grade.objects.filter(submission_id=sub_id).exists())
+        self.assertFalse(SubmissionSearch.objects.filter(submission_id=sub_id).exists())
+        self.assertTrue(GradeEvent.objects.filter(submission_id=sub_id).exists())
+        self.assertTrue(Enrollment.objects.filter(cohort=self.recent).exists())
+        self.assertTrue(Grade.objects.filter(submission__student=self.current).exists())
+        self.old.refresh_from_db()
+        self.assertIsNotNone(self.old.archived_at)
+
+        # nothing left to do on the next run
+        call_command("archive_cohorts", stdout=StringIO())
+        self.assertEqual(ArchivedTranscript.objects.count(), 1)
+
+    def test_transcripts_api(self):
+        call_command("archive_cohorts", stdout=StringIO())
+        mine = api_client(self.alumnus).get("/api/me/transcripts/", {"course_id": self.course.id})
+        self.assertEqual([t["cohort_id"] for t in mine.data["transcripts"]], [self.old.id])
+        staff = api_client(self.staff).get("/api/lecturer/archived-transcripts/", {"cohort_id": self.old.id})
+        self.assertEqual([t["student_email"] for t in staff.data["transcripts"]], ["ivan@example.com"])
+
+    def test_non_integer_filters(self):
+        self.assertEqual(api_client(self.alumnus).get("/api/me/transcripts/", {"course_id": "x"}).status_code, 400)
+        client = api_client(self.staff)
+        for param in ("cohort_id", "course_id"):
+            with self.subTest(param=param):
+                response = client.get("/api/lecturer/archived-transcripts/", {param: "1; DROP"})
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(LECTURER_CACHE_ENABLED=True)
+class LecturerCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create(username="kim", email="kim@example.com", is_staff=True)
+        cls.courses, cls.subs = [], []
+        for title in ("Voice", "Video"):
+            course = Course.objects.create(title=title)
+            assignment = Assignment.objects.create(module=Module.objects.create(course=course, title="M1"), title="A1")
+            student = User.objects.create(username=f"{title}-student", email=f"{title.lower()}@example.com")
+            cls.courses.append(course)
+            cls.subs.append(Submission.objects.create(assignment=assignment, student=student, file_url="https://example.com/f"))
+
+    def setUp(self):
+        caches["lecturer"].clear()
+        self.client = api_client(self.staff)
+
+    def page(self, course, **params):
+        return self.client.get("/api/lecturer/submissions/", {"course_id": course.id, "limit": 10, **params})
+
+    def test_grade_save_invalidates_course(self):
+        voice, video = self.courses
+        self.assertEqual(self.page(voice)["X-Cache"], "MISS")
+        self.assertEqual(self.page(video)["X-Cache"], "MISS")
+        self.assertEqual(self.page(voice)["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/lecturer/submissions/{self.subs[0].id}/grade/", {"score": 70}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.page(voice)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["submissions"][0]["grade"]["score"], 70)
+        self.assertEqual(self.page(voice)["X-Cache"], "HIT")
+        # other courses keep their entries
+        self.assertEqual(self.page(video)["X-Cache"], "HIT")
+
+        stats = self.client.get("/api/lecturer/submissions/cache-stats/").data
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 3))
+
+    def test_search_and_full_lists_bypass(self):
+        voice = self.courses[0]
+        self.assertEqual(self.page(voice, q="voice")["X-Cache"], "BYPASS")
+        response = self.client.get("/api/lecturer/submissions/", {"course_id": voice.id})
+        self.assertEqual(response["X-Cache"], "BYPASS")
+
+    @override_settings(LECTURER_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(self.page(self.courses[0])["X-Cache"], "BYPASS")
+        self.assertEqual(self.page(self.courses[0])["X-Cache"], "BYPASS")
+        self.assertFalse(self.client.get("/api/lecturer/submissions/cache-stats/").data["enabled"])
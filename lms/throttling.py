@@ -0,0 +1,88 @@
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+from rest_framework.throttling import SimpleRateThrottle
+
+# Counters live in their own cache alias so dev can use locmem while a
+# multi-worker deployment points it at a shared store (see CACHES["throttle"]).
+throttle_cache = ConnectionProxy(caches, "throttle")
+
+# seconds a bucket key lives after it was last (re)started
+BUCKET_TTL = 24 * 60 * 60
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket throttle using one atomic cache.incr() per request.
+
+    The bucket holds `num_requests` tokens and refills at `num_requests` per
+    `duration`. It is stored GCRA-style as a single integer: the theoretical
+    arrival time (ms) of the next conforming request. Taking a token is an
+    incr by one refill interval; a rejected request is rolled back with decr.
+
+    Rates come from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"][scope], so each
+    route sets its limit by using a throttle subclass with its own `scope`.
+    """
+    cache = throttle_cache
+    cache_format = "tb_%(scope)s_%(ident)s"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = int(self.duration * 1000 / self.num_requests)
+        capacity = interval * self.num_requests
+        now = int(self.timer() * 1000)
+
+        try:
+            tat = self.cache.incr(self.key, interval)
+        except ValueError:
+            tat = None
+
+        if tat is None or tat - interval < now:
+            # Missing or idle bucket is full: restart it from now. Two racing
+            # requests here can share one token, which is harmless. The long
+            # TTL keeps a busy bucket from expiring (and coming back full)
+            # without refreshing it per request; a stale tat is reset here.
+            self.cache.set(self.key, now + interval, max(BUCKET_TTL, self.duration * 2))
+            return True
+
+        if tat - now > capacity:
+            self.cache.decr(self.key, interval)
+            self.wait_seconds = (tat - now - capacity) / 1000
+            return False
+
+        return True
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Buckets keyed by client IP (honours NUM_PROXIES like DRF's throttles)."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": f"{self.scope}_ip", "ident": self.get_ident(request)}
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Buckets keyed by user id, falling back to IP for anonymous requests."""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": f"{self.scope}_user", "ident": ident}
+
+
+class GoogleAuthThrottle(IPTokenBucketThrottle):
+    scope = "auth_google"
+
+
+class SubmitAssignmentThrottle(UserTokenBucketThrottle):
+    scope = "submit_assignment"
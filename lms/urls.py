@@ -1,8 +1,12 @@
 from django.urls import path
 
 from .views import GoogleAuthView, my_course_grades
-from .api import my_courses, course_assignments, submit_assignment
-from .lecturer_api import lecturer_submissions, grade_submission, lock_grade
+from .api import my_courses, my_dashboard, course_assignments, submit_assignment, my_transcripts, my_events_ticket
+from .stream import my_grade_events
+from .lecturer_api import (
+    lecturer_submissions, grade_submission, lock_grade, grade_history, cohort_rollups,
+    export_course_grades, finalize_assignment, finalize_course, archived_transcripts, lecturer_cache_stats,
+)
 
 urlpatterns = [
     # Student auth
@@ -10,13 +14,24 @@ urlpatterns = [
 
     # Student endpoints
     path("me/courses/", my_courses, name="my-courses"),
+    path("me/dashboard/", my_dashboard, name="my-dashboard"),
     path("me/assignments/", course_assignments, name="course-assignments"),
     path("me/grades/", my_course_grades, name="my-course-grades"),
+    path("me/events/", my_grade_events, name="my-grade-events"),
+    path("me/events/ticket/", my_events_ticket, name="my-events-ticket"),
+    path("me/transcripts/", my_transcripts, name="my-transcripts"),
     path("assignments/<int:assignment_id>/submit/", submit_assignment, name="submit-assignment"),
 
     # Lecturer endpoints (staff only)
     path("lecturer/submissions/", lecturer_submissions, name="lecturer-submissions"),
+    path("lecturer/submissions/cache-stats/", lecturer_cache_stats, name="lecturer-cache-stats"),
     path("lecturer/submissions/<int:submission_id>/grade/", grade_submission, name="grade-submission"),
     path("lecturer/submissions/<int:submission_id>/lock/", lock_grade, name="lock-grade"),
+    path("lecturer/submissions/<int:submission_id>/history/", grade_history, name="grade-history"),
+    path("lecturer/assignments/<int:assignment_id>/finalize/", finalize_assignment, name="finalize-assignment"),
+    path("lecturer/courses/<int:course_id>/finalize/", finalize_course, name="finalize-course"),
+    path("lecturer/cohort-rollups/", cohort_rollups, name="cohort-rollups"),
+    path("lecturer/grades/export/", export_course_grades, name="export-course-grades"),
+    path("lecturer/archived-transcripts/", archived_transcripts, name="archived-transcripts"),
 
 ]
@@ -3,9 +3,6 @@ import os
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
 
-from google.oauth2 import id_token
-from google.auth.transport import requests
-
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -14,15 +11,19 @@ from rest_framework.permissions import IsAuthenticated
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import add_user_claims
+from .grading import GradingPolicy, student_breakdown
 from .models import ApprovedStudentEmail, Enrollment, Submission
 from .serializers import GoogleAuthSerializer
+from .throttling import GoogleAuthThrottle
 
 User = get_user_model()
-PASS_MARK = 70.0
 
 
-def issue_jwt_for_user(user) -> dict:
+def issue_jwt_for_user(user, cohort_id=None) -> dict:
     refresh = RefreshToken.for_user(user)
+    # claims are copied onto the access token, see ClaimsJWTAuthentication
+    add_user_claims(refresh, user, cohort_id=cohort_id)
     return {
         "refresh": str(refresh),
         "access": str(refresh.access_token),
@@ -31,6 +32,7 @@ def issue_jwt_for_user(user) -> dict:
 
 class GoogleAuthView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [GoogleAuthThrottle]
 
     # Optional: helpful message if you open endpoint in browser
     def get(self, request):
@@ -47,6 +49,11 @@ class GoogleAuthView(APIView):
 
         google_client_id = os.getenv("GOOGLE_CLIENT_ID")
 
+        # Imported here so workers that never see a login don't load the
+        # google-auth/requests stack (see manage.py benchmark_startup).
+        from google.oauth2 import id_token
+        from google.auth.transport import requests
+
         try:
             if google_client_id:
                 payload = id_token.verify_oauth2_token(
@@ -111,7 +118,7 @@ class GoogleAuthView(APIView):
                 # if something still raced, just fetch
                 user = User.objects.filter(email=email).order_by("id").first()
 
-        tokens = issue_jwt_for_user(user)
+        tokens = issue_jwt_for_user(user, cohort_id=approved.cohort_id)
 
         return Response({
             "tokens": tokens,
@@ -129,6 +136,47 @@ class GoogleAuthView(APIView):
         })
 
 
+def grade_item(s, adjusted_percent=None, dropped=False):
+    """
+    One row of a student's grade list. Expects assignment, assignment__module
+    and grade to be select_related.
+    """
+    assignment = s.assignment
+    grade = getattr(s, "grade", None)
+
+    if grade and assignment.max_score > 0:
+        percent = (float(grade.score) / float(assignment.max_score)) * 100.0
+    else:
+        percent = None
+
+    return {
+        "assignment_id": assignment.id,
+        "module_title": assignment.module.title,
+        "assignment_title": assignment.title,
+        "max_score": assignment.max_score,
+        "score": None if not grade else grade.score,
+        "percent": percent,
+        "adjusted_percent": adjusted_percent,
+        "dropped": dropped,
+        "feedback": "" if not grade else (grade.feedback or ""),
+        "locked": False if grade is None else bool(getattr(grade, "locked", False)),
+        "submitted_at": s.submitted_at,
+    }
+
+
+def course_grade_summary(submissions, course):
+    """(items, average_percent, result) for one student's submissions in `course`."""
+    submissions = list(submissions)
+    policy = GradingPolicy.for_course(course)
+    average, rows = student_breakdown(submissions, policy)
+
+    items = [
+        grade_item(s, adjusted_percent=adjusted, dropped=dropped)
+        for s, (_, adjusted, dropped) in zip(submissions, rows)
+    ]
+    return items, average, policy.result(average)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def my_course_grades(request):
@@ -139,11 +187,13 @@ def my_course_grades(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    if not Enrollment.objects.filter(
-        student=request.user,
-        course_id=course_id,
-        status="ACTIVE"
-    ).exists():
+    enrollment = (
+        Enrollment.objects
+        .filter(student=request.user, course_id=course_id, status="ACTIVE")
+        .select_related("course")
+        .first()
+    )
+    if not enrollment:
         return Response(
             {"detail": "Not enrolled in this course."},
             status=status.HTTP_403_FORBIDDEN
@@ -159,42 +209,12 @@ def my_course_grades(request):
         .order_by("assignment__module__order", "assignment__id")
     )
 
-    items = []
-    percents = []
-
-    for s in submissions:
-        assignment = s.assignment
-        grade = getattr(s, "grade", None)
-
-        if grade and assignment.max_score > 0:
-            percent = (float(grade.score) / float(assignment.max_score)) * 100.0
-            percents.append(percent)
-        else:
-            percent = None
-
-        items.append({
-            "assignment_id": assignment.id,
-            "module_title": assignment.module.title,
-            "assignment_title": assignment.title,
-            "max_score": assignment.max_score,
-            "score": None if not grade else grade.score,
-            "percent": percent,
-            "feedback": "" if not grade else (grade.feedback or ""),
-            "locked": False if grade is None else bool(getattr(grade, "locked", False)),
-            "submitted_at": s.submitted_at,
-        })
-
-    average = (sum(percents) / len(percents)) if percents else None
-
-    if average is None:
-        result = None
-    else:
-        result = "PASS" if average >= PASS_MARK else "F"
+    items, average, result = course_grade_summary(submissions, enrollment.course)
 
     return Response({
         "course_id": int(course_id),
         "average_percent": average,
         "result": result,
-        "pass_mark": PASS_MARK,
+        "pass_mark": enrollment.course.pass_mark,
         "grades": items,
     })